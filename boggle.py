@@ -1,13 +1,26 @@
 import random
+from array import array
+from collections import Counter, namedtuple
+from functools import lru_cache
+from itertools import accumulate
 from boggle_cl_interface import BoggleInterface
+from boggle_dictionary import SignatureIndex, Trie, dictionary_cache
+from boggle_instrumentation import NULL_INSTRUMENTATION, CountingTrie
+
+
+Solution = namedtuple('Solution', ['words', 'max_score'])
 
 
 class Boggle:
 
-    def __init__(self, grid_size, max_rounds, interface=None,  scoring_model=None, max_players=None, dictionary=None):
+    def __init__(self, grid_size, max_rounds, interface=None,  scoring_model=None, max_players=None, dictionary=None,
+                 compact_board=False, instrumentation=None, history=None, distribution=None):
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
         self.x_width = grid_size[0]
         self.y_width = grid_size[1]
-        self.board = Board(grid_size)
+        self.distribution = distribution or ENGLISH
+        self.compact_board = compact_board
+        self.current_board = None
         self.players = []
         self.max_rounds = max_rounds
         self.current_round = 0
@@ -17,65 +30,249 @@ class Boggle:
         self.scoring_model = scoring_model
         if not self.scoring_model:
             self.scoring_model = [(0, 0), (3, 1), (4, 1), (5, 2), (6, 3), (7, 5), (8, 11)]
+        self.scorer = build_scorer(tuple(tuple(x) for x in self.scoring_model), self.x_width * self.y_width)
         self.max_players = max_players
         if not self.max_players:
             self.max_players = 2
         self.dictionary = dictionary
         if not self.dictionary:
             self.dictionary = 'boggle_words.txt'
-        self.boggle_words = self.build_boggle_words()
+        self.dictionary_entry = None
+        self.dictionary_load = dictionary_cache.prefetch(self.dictionary, self.scoring_model[1][0],
+                                                         self.x_width * self.y_width)
+        self.word_trie = None
+        self.candidates = None
+        self.history = history
+
+    @property
+    def board(self):
+        """
+        The Board is only built when it is first used, so an idle game holds none.
+        """
+        if self.current_board is None:
+            if self.compact_board:
+                self.current_board = CompactBoard((self.x_width, self.y_width), distribution=self.distribution)
+            else:
+                self.current_board = Board((self.x_width, self.y_width), distribution=self.distribution)
+        return self.current_board
+
+    @board.setter
+    def board(self, board):
+        self.current_board = board
+
+    @property
+    def boggle_words(self):
+        return self.load_dictionary().words
+
+    def load_dictionary(self):
+        """
+        The dictionary starts loading in the background when the game is created, and is waited for here the first
+        time it is needed.  Loading errors, e.g. a missing word list, are raised from here too.
+        :return: The game's DictionaryEntry
+        """
+        if self.dictionary_entry is None:
+            with self.instrumentation.phase('dictionary_load', per_game=True):
+                self.dictionary_entry = dictionary_cache.wait(self.dictionary_load, self.dictionary,
+                                                              self.scoring_model[1][0], self.x_width * self.y_width)
+        return self.dictionary_entry
 
     def build_boggle_words(self):
-        words = open(self.dictionary, 'r').read().split('\n')
-        return {x.lower() for x in words if self.scoring_model[1][0] <= len(x) <= self.x_width * self.y_width}
+        return self.load_dictionary().words
+
+    def build_word_trie(self):
+        if self.word_trie is None:
+            self.word_trie = self.load_dictionary().build_trie(self.distribution.tokens)
+            dictionary_cache.evict()
+        return self.word_trie
+
+    def candidate_words(self):
+        """
+        Looks the Board's faces up in the dictionary's SignatureIndex, once for each multiset of faces the Board shows,
+        i.e. again only after it has been shaken or otherwise changed.  The index is built the first time it is needed,
+        which takes about as long as building the dictionary Trie, so only the solvers use it; checking the few words a
+        player submits is cheaper against the Board's letter counts.
+        :return: A frozenset of the dictionary words (in lowercase) that need no more of any letter than the Board's
+        faces hold between them, a superset of the words on the Board; or None if the Board shows more than
+        SignatureIndex.SELECTIVE_CHARS distinct letters, so the index would hardly narrow the dictionary down
+        """
+        inventory = Counter(''.join(self.board.faces()).lower())
+        if len(inventory) > SignatureIndex.SELECTIVE_CHARS:
+            return None
+        key = frozenset(inventory.items())
+        if self.candidates is None or self.candidates[0] != key:
+            index = self.load_dictionary().build_signature_index()
+            dictionary_cache.evict()
+            self.candidates = (key, frozenset(index.candidates(inventory)), None)
+        return self.candidates[1]
+
+    def build_candidate_trie(self):
+        """
+        :return: A Trie over candidate_words, cached until the Board's faces change, or None if there are none
+        """
+        words = self.candidate_words()
+        if words is None:
+            return None
+        if self.candidates[2] is None:
+            self.candidates = (self.candidates[0], words, self.distribution.build_trie(words))
+        return self.candidates[2]
 
     def add_players(self):
         names = self.interface.get_player_names()
         for name in names:
             self.players.append(Player(name=name))
-            self.players[-1].build_score_dict(max_rounds=self.max_rounds)
+            if self.history is None:
+                self.players[-1].build_score_dict(max_rounds=self.max_rounds)
 
     def run_game(self):
         while self.current_round < self.max_rounds:
             self.run_round()
-            self.current_round += 1
+            self.next_round()
+        return self.end_game()
+
+    def next_round(self):
+        """
+        Closes the round just played and rerolls the Board for the next one.
+        """
+        self.current_round += 1
+        with self.instrumentation.phase('shuffle'):
             self.board.shuffle_cubes()
             self.board.reassign_cubes()
             self.board.shake_cubes()
+        self.instrumentation.end_round(self.current_round - 1)
+
+    def end_game(self):
+        """
+        :return: The Player with the highest score
+        """
         self.interface.display_final_scores()
+        if self.history is not None:
+            self.history.record_game(self)
+        self.instrumentation.end_game()
         return max(self.players, key=lambda x: x.score)
 
     def run_round(self):
         for player in self.players:
             self.run_turn(player)
-        self.score_round()
+        with self.instrumentation.phase('scoring'):
+            self.score_round()
+        if self.history is not None:
+            self.history.record_round(self)
 
     def run_turn(self, active_player):
-        self.interface.display_board()
-        self.interface.display_scores()
-        words = self.interface.get_words(active_player)
-        for word in words:
-            if self.find_word(word):
-                active_player.words[self.current_round][word] = self.score_word(word)
+        with self.instrumentation.phase('interface'):
+            self.interface.display_board()
+            self.interface.display_scores()
+            words = self.interface.get_words(active_player)
+        self.instrumentation.count('words_submitted', len(words))
+        with self.instrumentation.phase('validation'):
+            active_player.words.setdefault(self.current_round, {}).update(self.validate_words(words))
+
+    def validate_words(self, words):
+        """
+        Checks a batch of words at once.  Words that are not valid English, or that need more of some letter than the
+        Board's faces hold between them, are rejected before any search; the rest are traced together, so words that
+        share a prefix share the work of tracing it.
+        :param words: Should be all uppercase Strings
+        :return: A dict mapping every word that find_word would accept to its score, in the order given
+        """
+        faces = [face.upper() for face in self.board.faces()]
+        inventory = Counter(''.join(faces))
+        candidates = Trie(word for word in set(words) if inventory.keys() >= set(word) and
+                          all(inventory[char] >= count for char, count in Counter(word).items()) and
+                          self.check_if_valid_english(word=word.lower()))
+        found = self.search_board(candidates, faces)
+        return self.scorer.score_words(word for word in words if word in found)
 
     def find_word(self, word):
         if not self.check_if_valid_english(word=word.lower()):
             return False
-        for row in self.board.spaces:
-            for space in row:
-                if self.trace_path(word, space, set()):
-                    return True
+        return self.trace_word(word)
+
+    def trace_word(self, word):
+        """
+        :param word: Should be an all uppercase String
+        :return: True if word can be traced on the Board without reusing a Space, whether or not it is valid English
+        """
+        faces = [face.upper() for face in self.board.faces()]
+        visited = bytearray(len(faces))
+        for index, face in enumerate(faces):
+            if word.startswith(face) and self.trace_index(word, index, visited, faces):
+                return True
         return False
 
     def trace_path(self, word, space, consumed_spaces):
-        if word[:len(space.cube.top_letter)] != space.cube.top_letter.upper():
+        faces = [face.upper() for face in self.board.faces()]
+        visited = bytearray(len(faces))
+        for consumed in consumed_spaces:
+            visited[consumed.index] = 1
+        return self.trace_index(word, space.index, visited, faces)
+
+    def trace_index(self, word, start, visited, faces):
+        """
+        Checks whether word can be traced starting at the Space numbered start.  The search is a depth first search over
+        explicit stacks, one entry per Space on the path, so it never recurses however long word is.
+        :param visited: A bytearray with a nonzero entry for every Space that may not be used; entries set by the search
+        are cleared again before it returns
+        :param faces: The uppercase top_letter of every Space, in index order
+        """
+        if not word.startswith(faces[start]):
             return False
-        elif word == space.cube.top_letter.upper():
+        if len(faces[start]) == len(word):
             return True
-        else:
-            for neighbor in filter(lambda x: x not in consumed_spaces, space.adjacents):
-                if self.trace_path(word[len(space.cube.top_letter):], neighbor, consumed_spaces | {space}):
+        adjacency = self.board.adjacency
+        depth = min(len(word), len(faces))
+        path, offsets, neighbors = [0] * depth, [0] * depth, [None] * depth
+        path[0], offsets[0], neighbors[0] = start, len(faces[start]), iter(adjacency[start])
+        visited[start] = 1
+        level = 0
+        while level >= 0:
+            offset = offsets[level]
+            for neighbor in neighbors[level]:
+                if visited[neighbor] or not word.startswith(faces[neighbor], offset):
+                    continue
+                if offset + len(faces[neighbor]) == len(word):
+                    for index in path[:level + 1]:
+                        visited[index] = 0
                     return True
+                level += 1
+                path[level], offsets[level] = neighbor, offset + len(faces[neighbor])
+                neighbors[level] = iter(adjacency[neighbor])
+                visited[neighbor] = 1
+                break
+            else:
+                visited[path[level]] = 0
+                level -= 1
+        return False
+
+    def find_all_words(self):
+        """
+        Walks the Board once against the dictionary Trie, abandoning a path as soon as the letters along it stop being
+        the prefix of any word.  On a Board showing only a few distinct letters the Trie holds just candidate_words.
+        :return: A set of every dictionary word that can be traced on the Board (in the dictionary's lowercase form)
+        """
+        trie = self.build_candidate_trie() or self.build_word_trie()
+        found = self.search_board(trie, [face.lower() for face in self.board.faces()])
+        return {word for word in found if word in self.boggle_words}
+
+    def solve(self, cache=None):
+        """
+        :param cache: Optionally, a boggle_solutions.SolutionCache to look the Board up in first
+        :return: A Solution holding every word on the Board and the highest score a single player could reach
+        """
+        if cache is not None:
+            return cache.solve(self)
+        words = self.find_all_words()
+        return Solution(frozenset(words), self.scorer.total(words))
+
+    def search_board(self, trie, faces):
+        """
+        :param trie: A Trie (or CompiledDictionary) holding the words to look for
+        :param faces: The top_letter of every Space, in index order, in the same case as the words in trie
+        :return: The set of words in trie that can be traced on the Board
+        """
+        if self.instrumentation.enabled:
+            trie = CountingTrie(trie, self.instrumentation)
+        return search_paths(trie, faces, self.board.adjacency, range(len(faces)))
 
     def check_if_valid_english(self, word):
         if not word:
@@ -84,20 +281,60 @@ class Boggle:
             return word in self.boggle_words
 
     def score_word(self, word):
-        for idx, tup in enumerate(self.scoring_model):
-            if len(word) < tup[0]:
-                return self.scoring_model[idx - 1][1]
-        return self.scoring_model[-1][1]
+        return self.scorer(word)
 
     def score_round(self):
+        """
+        Zeroes every word found by more than one player this round, then adds each player's round score to their total.
+        """
+        finders = Counter(word for player in self.players for word in player.words.get(self.current_round, ()))
         for player in self.players:
-            op_words = sum([list(x.words[self.current_round].keys()) for x in self.players if x is not player], [])
-            for word in player.words[self.current_round]:
-                if word in op_words:
-                    player.words[self.current_round][word] = 0
+            round_words = player.words.setdefault(self.current_round, {})
+            for word in round_words:
+                if finders[word] > 1:
+                    round_words[word] = 0
             player.compute_score(self.current_round)
 
 
+class Scorer:
+    """
+    A scoring_model compiled into a table of scores indexed by word length, so scoring a word is a single lookup.
+    """
+
+    def __init__(self, scoring_model, max_length):
+        """
+        :param scoring_model: A list of (minimum length, score) tuples, as passed to Boggle
+        :param max_length: The longest word that will be scored, usually the number of Spaces on the Board; longer
+        words are still scored correctly
+        """
+        self.scoring_model = scoring_model
+        longest = max(max_length, max(length for length, _ in scoring_model))
+        self.table = [self.score_length(length) for length in range(longest + 1)]
+
+    def score_length(self, length):
+        for idx, tup in enumerate(self.scoring_model):
+            if length < tup[0]:
+                return self.scoring_model[idx - 1][1]
+        return self.scoring_model[-1][1]
+
+    def __call__(self, word):
+        length = len(word)
+        return self.table[length] if length < len(self.table) else self.table[-1]
+
+    def score_words(self, words):
+        """
+        :return: A dict mapping each of words to its score
+        """
+        table = self.table
+        last = len(table) - 1
+        return {word: table[min(len(word), last)] for word in words}
+
+    def total(self, words):
+        table = self.table
+        last = len(table) - 1
+        return sum(table[min(len(word), last)] for word in words)
+
+
 class Player:
 
     def __init__(self, name):
@@ -114,26 +351,36 @@ class Player:
 
 class Board:
 
-    def __init__(self, grid_size):
+    def __init__(self, grid_size, cubes=None, distribution=None):
         self.grid_size = grid_size
         self.x_width = grid_size[0]
         self.y_width = grid_size[1]
+        self.distribution = distribution or ENGLISH
         self.spaces = []
-        self.cubes = []
+        self.cubes = cubes or []
+        self.adjacency_table = None
         if not self.cubes:
             self.make_cubes()
         if not self.spaces:
             self.populate_spaces()
 
+    @property
+    def adjacency(self):
+        """
+        For each Space index, the indices of its neighbors, looked up the first time a search needs them.
+        """
+        if self.adjacency_table is None:
+            self.adjacency_table = build_adjacency(self.x_width, self.y_width)
+        return self.adjacency_table
+
     def populate_spaces(self):
         count = 0
         for y in range(self.y_width):
             row = []
             for x in range(self.x_width):
-                row.append(Space(x_coord=x, y_coord=y, cube=self.cubes[count]))
+                row.append(Space(x_coord=x, y_coord=y, cube=self.cubes[count], index=count, board=self))
                 count += 1
             self.spaces.append(row)
-        self.generate_adjacents()
         self.shake_cubes()
 
     def generate_adjacents(self):
@@ -141,8 +388,15 @@ class Board:
             for space in row:
                 space.find_adjacents(board=self)
 
+    def faces(self):
+        """
+        :return: The top_letter of every Space, in row-major order (so a Space's index is its position in the list)
+        """
+        return [space.cube.top_letter for row in self.spaces for space in row]
+
     def make_cubes(self):
-        self.cubes = [x() for x in [Cube]*(self.x_width * self.y_width)]
+        letters = self.distribution.sample(6 * self.x_width * self.y_width)
+        self.cubes = [Cube(letters[6 * x:6 * x + 6]) for x in range(self.x_width * self.y_width)]
 
     def shuffle_cubes(self):
         self.cubes = random.sample(self.cubes, k=len(self.cubes))
@@ -159,40 +413,374 @@ class Board:
             x.roll_cube()
 
 
+class CompactBoard:
+    """
+    A Board that keeps its state in flat arrays rather than in Space and Cube objects, for very large grids.
+
+    Faces are stored as indices into a table of face tokens: letters holds the six faces of every Cube, tops the face
+    each Cube is showing, cube_order the Cubes in the order Board.cubes would hold them, and placement the Cube sitting
+    on each Space.  spaces and cubes are lightweight views over these arrays, so board.spaces[y][x].cube.top_letter
+    reads and writes the arrays directly.  Each Space's neighbors come from build_adjacency_csr's arrays, shared by
+    every Board of the same shape.
+    """
+
+    def __init__(self, grid_size, letters=None, tops=None, distribution=None):
+        """
+        :param letters: Optionally, the token index of each face of each Cube (six per Cube), e.g. from a BoardBatch
+        :param tops: Optionally, the token index each Cube is showing; the Cubes are shaken if not given
+        :param distribution: The LetterDistribution Cubes are made from; token indices refer to its tokens
+        """
+        self.grid_size = grid_size
+        self.x_width = grid_size[0]
+        self.y_width = grid_size[1]
+        self.distribution = distribution or ENGLISH
+        self.tokens = list(self.distribution.tokens)
+        self.token_ids = {token: index for index, token in enumerate(self.tokens)}
+        self.adjacency_offsets = self.adjacency_indices = None
+        self.adjacency_table = None
+        self.cube_order = array('I', range(self.x_width * self.y_width))
+        self.placement = array('I', self.cube_order)
+        self.letters = letters
+        self.view_rows = None
+        if self.letters is None:
+            self.make_cubes()
+        self.tops = tops
+        if self.tops is None:
+            self.tops = array('H', bytes(2 * len(self.cube_order)))
+            self.shake_cubes()
+
+    @property
+    def adjacency(self):
+        """
+        The same neighbors as neighbors(), as the tuple-of-tuples table search_paths walks fastest.
+        """
+        if self.adjacency_table is None:
+            self.adjacency_table = build_adjacency(self.x_width, self.y_width)
+        return self.adjacency_table
+
+    def neighbors(self, index):
+        """
+        :return: The indices of the neighbors of the Space numbered index, read from the shared CSR arrays, which are
+        looked up the first time a Space's neighbors are
+        """
+        if self.adjacency_offsets is None:
+            self.adjacency_offsets, self.adjacency_indices = build_adjacency_csr(self.x_width, self.y_width)
+        return self.adjacency_indices[self.adjacency_offsets[index]:self.adjacency_offsets[index + 1]]
+
+    @property
+    def spaces(self):
+        if self.view_rows is None:
+            self.view_rows = [[CompactSpace(self, y * self.x_width + x) for x in range(self.x_width)]
+                              for y in range(self.y_width)]
+        return self.view_rows
+
+    @property
+    def cubes(self):
+        return [CompactCube(self, cube) for cube in self.cube_order]
+
+    def faces(self):
+        tokens = self.tokens
+        tops = self.tops
+        return [tokens[tops[cube]] for cube in self.placement]
+
+    def token_id(self, token):
+        if token not in self.token_ids:
+            self.token_ids[token] = len(self.tokens)
+            self.tokens.append(token)
+        return self.token_ids[token]
+
+    def make_cubes(self):
+        self.letters = array('H', self.distribution.sample_ids(6 * len(self.cube_order)))
+
+    def shuffle_cubes(self):
+        self.cube_order = array('I', random.sample(self.cube_order, k=len(self.cube_order)))
+
+    def reassign_cubes(self):
+        self.placement = array('I', self.cube_order)
+
+    def shake_cubes(self):
+        letters = self.letters
+        rolls = random.choices(range(6), k=len(self.tops))
+        self.tops = array('H', [letters[6 * cube + roll] for cube, roll in enumerate(rolls)])
+
+
+class CompactSpace:
+    """
+    A view of one Space of a CompactBoard, with the same attributes as Space.
+    """
+
+    __slots__ = ('board', 'index')
+
+    def __init__(self, board, index):
+        self.board = board
+        self.index = index
+
+    @property
+    def x_coord(self):
+        return self.index % self.board.x_width
+
+    @property
+    def y_coord(self):
+        return self.index // self.board.x_width
+
+    @property
+    def cube(self):
+        return CompactCube(self.board, self.board.placement[self.index])
+
+    @cube.setter
+    def cube(self, cube):
+        self.board.placement[self.index] = cube.index
+
+    @property
+    def adjacents(self):
+        rows = self.board.spaces
+        x_width = self.board.x_width
+        return [rows[index // x_width][index % x_width] for index in self.board.neighbors(self.index)]
+
+
+class CompactCube:
+    """
+    A view of one Cube of a CompactBoard, with the same attributes as Cube.
+    """
+
+    __slots__ = ('board', 'index')
+
+    def __init__(self, board, index):
+        self.board = board
+        self.index = index
+
+    def __eq__(self, other):
+        return isinstance(other, CompactCube) and (self.board, self.index) == (other.board, other.index)
+
+    def __hash__(self):
+        return hash((id(self.board), self.index))
+
+    @property
+    def letters(self):
+        tokens = self.board.tokens
+        return [tokens[x] for x in self.board.letters[6 * self.index:6 * self.index + 6]]
+
+    @letters.setter
+    def letters(self, letters):
+        self.board.letters[6 * self.index:6 * self.index + 6] = array('H', map(self.board.token_id, letters))
+
+    @property
+    def top_letter(self):
+        return self.board.tokens[self.board.tops[self.index]]
+
+    @top_letter.setter
+    def top_letter(self, top_letter):
+        self.board.tops[self.index] = self.board.token_id(top_letter)
+
+    def generate_letters(self):
+        self.letters = self.board.distribution.sample(6)
+
+    def roll_cube(self):
+        self.board.tops[self.index] = self.board.letters[6 * self.index + random.randrange(6)]
+
+
+def search_paths(trie, faces, adjacency, starts):
+    """
+    Walks every path that begins at one of starts, abandoning it as soon as its letters stop being the prefix of any
+    word in trie.  The walk is a depth first search over explicit stacks sized to the shorter of trie's longest word and
+    the Board, so it never recurses and its memory does not grow as it runs.
+    :param faces: The top_letter of every Space, in index order, in the same case as the words in trie
+    :param adjacency: For each Space index, the indices of its neighbors, as built by build_adjacency
+    :param starts: The indices of the Spaces to start paths from
+    :return: The set of words in trie that can be traced from starts
+    """
+    step, is_word = trie.step, trie.is_word
+    if isinstance(trie, Trie) and all(len(face) == 1 or face in trie.tokens for face in faces):
+        step = dict.get
+    depth = max(1, min(len(faces), trie.longest))
+    path, nodes, prefixes, neighbors = [0] * depth, [None] * depth, [''] * depth, [None] * depth
+    visited = bytearray(len(faces))
+    found = set()
+    for start in starts:
+        node = step(trie.root, faces[start])
+        if node is None:
+            continue
+        if is_word(node):
+            found.add(faces[start])
+        path[0], nodes[0], prefixes[0] = start, node, faces[start]
+        neighbors[0] = iter(adjacency[start] if depth > 1 else ())
+        visited[start] = 1
+        level = 0
+        while level >= 0:
+            for neighbor in neighbors[level]:
+                if visited[neighbor]:
+                    continue
+                node = step(nodes[level], faces[neighbor])
+                if node is None:
+                    continue
+                prefix = prefixes[level] + faces[neighbor]
+                if is_word(node):
+                    found.add(prefix)
+                level += 1
+                path[level], nodes[level], prefixes[level] = neighbor, node, prefix
+                neighbors[level] = iter(adjacency[neighbor] if level + 1 < depth else ())
+                visited[neighbor] = 1
+                break
+            else:
+                visited[path[level]] = 0
+                level -= 1
+    return found
+
+
+@lru_cache(maxsize=None)
+def build_scorer(scoring_model, max_length):
+    """
+    :param scoring_model: A scoring_model as a tuple of tuples
+    :return: A Scorer, shared by every game with the same scoring_model and Board size
+    """
+    return Scorer(list(scoring_model), max_length)
+
+
+@lru_cache(maxsize=None)
+def build_adjacency(x_width, y_width):
+    """
+    :return: For each Space index on an x_width by y_width Board, a tuple of the indices of its neighbors.  The result
+    is shared by every Board of the same shape.
+    """
+    adjacency = []
+    for y in range(y_width):
+        for x in range(x_width):
+            adjacency.append(tuple(ny * x_width + nx for ny in (y + 1, y, y - 1) if 0 <= ny < y_width
+                                   for nx in (x + 1, x, x - 1) if 0 <= nx < x_width and (nx, ny) != (x, y)))
+    return tuple(adjacency)
+
+
+@lru_cache(maxsize=None)
+def build_adjacency_csr(x_width, y_width):
+    """
+    :return: The neighbors of every Space on an x_width by y_width Board in compressed sparse row form, as (offsets,
+    indices) arrays: the neighbors of Space n are indices[offsets[n]:offsets[n + 1]], in the same order as
+    build_adjacency lists them.  The result is shared by every Board of the same shape.
+    """
+    offsets = array('I', [0])
+    indices = array('I')
+    for y in range(y_width):
+        for x in range(x_width):
+            for ny in (y + 1, y, y - 1):
+                if 0 <= ny < y_width:
+                    indices.extend(ny * x_width + nx for nx in (x + 1, x, x - 1)
+                                   if 0 <= nx < x_width and (nx, ny) != (x, y))
+            offsets.append(len(indices))
+    return offsets, indices
+
+
 class Space:
 
-    def __init__(self, x_coord, y_coord, cube):
+    __slots__ = ('x_coord', 'y_coord', 'index', 'cube', 'board', 'adjacent_spaces')
+
+    def __init__(self, x_coord, y_coord, cube, index=None, board=None):
+        """
+        :param board: The Board the Space belongs to, from which adjacents is found when it is first read
+        """
         self.x_coord = x_coord
         self.y_coord = y_coord
+        self.index = index
         self.cube = cube
         if not self.cube.letters:
             self.cube.generate_letters()
-        self.adjacents = []
+        self.board = board
+        self.adjacent_spaces = None
+
+    @property
+    def adjacents(self):
+        if self.adjacent_spaces is None:
+            self.adjacent_spaces = []
+            if self.board is not None:
+                self.find_adjacents(self.board)
+        return self.adjacent_spaces
+
+    @adjacents.setter
+    def adjacents(self, adjacents):
+        self.adjacent_spaces = adjacents
 
     def find_adjacents(self, board):
-        for y in [1, 0, -1]:
-            if self.y_coord + y not in range(board.y_width):
-                continue
-            for x in [1, 0, -1]:
-                if self.x_coord + x not in range(board.x_width):
-                    continue
-                self.adjacents.append(board.spaces[self.y_coord + y][self.x_coord + x])
-        self.adjacents.remove(self)
+        self.adjacent_spaces = [board.spaces[index // board.x_width][index % board.x_width]
+                                for index in board.adjacency[self.index]]
+
+
+class LetterDistribution:
+    """
+    The face tokens Cubes are made from, and how often each turns up.  The weights are turned into cumulative weights
+    and a Walker alias table once, so drawing a face costs one random number however many tokens there are.
+    """
+
+    def __init__(self, weights):
+        """
+        :param weights: A dict mapping each face token (e.g. 'A', or 'Qu' for a multi-character face) to its weight
+        """
+        self.weights = dict(weights)
+        self.tokens = list(self.weights)
+        self.cum_weights = list(accumulate(self.weights.values()))
+        self.probability, self.alias = self.build_alias_table(list(self.weights.values()))
+
+    @staticmethod
+    def build_alias_table(weights):
+        """
+        :return: (probability, alias) lists: pick a slot n uniformly, then keep n with probability probability[n] or
+        take alias[n] instead
+        """
+        total = sum(weights)
+        probability = [weight * len(weights) / total for weight in weights]
+        alias = list(range(len(weights)))
+        small = [n for n, scaled in enumerate(probability) if scaled < 1]
+        large = [n for n, scaled in enumerate(probability) if scaled >= 1]
+        while small and large:
+            short, tall = small.pop(), large.pop()
+            alias[short] = tall
+            probability[tall] -= 1 - probability[short]
+            (small if probability[tall] < 1 else large).append(tall)
+        for n in small + large:
+            probability[n] = 1.0
+        return probability, alias
+
+    def sample_ids(self, k, rng=random):
+        """
+        :return: A list of k random indices into tokens
+        """
+        draw, probability, alias, slots = rng.random, self.probability, self.alias, len(self.tokens)
+        ids = []
+        for _ in range(k):
+            slot = draw() * slots
+            n = int(slot)
+            ids.append(n if slot - n < probability[n] else alias[n])
+        return ids
+
+    def sample(self, k, rng=random):
+        """
+        :return: A list of k random face tokens
+        """
+        tokens = self.tokens
+        return [tokens[n] for n in self.sample_ids(k, rng)]
+
+    def build_trie(self, words):
+        """
+        :return: A Trie over words with a shortcut for every multi-character token (see Trie.add_tokens)
+        """
+        return Trie(words, [token.lower() for token in self.tokens])
+
+
+ALPHABET = {'A': 6, 'B': 2, 'C': 2, 'D': 3, 'E': 11, 'F': 2, 'G': 2, 'H': 5, 'I': 6, 'J': 1, 'K': 1, 'L': 4, 'M': 2,
+            'N': 6, 'O': 7, 'P': 2, 'Qu': 1, 'R': 5, 'S': 6, 'T': 9, 'U': 3, 'V': 2, 'W': 3, 'X': 1, 'Y': 3, 'Z': 1}
+ENGLISH = LetterDistribution(ALPHABET)
 
 
 class Cube:
 
-    def __init__(self):
-        self.letters = []
+    __slots__ = ('letters', 'top_letter')
+
+    def __init__(self, letters=None, distribution=None):
+        self.letters = letters or []
         if not self.letters:
-            self.generate_letters()
+            self.generate_letters(distribution)
         self.top_letter = self.letters[0]
 
-    def generate_letters(self):
-        alphabet = {'A': 6, 'B': 2, 'C': 2, 'D': 3, 'E': 11, 'F': 2, 'G': 2, 'H': 5, 'I': 6, 'J': 1, 'K': 1, 'L': 4,
-                    'M': 2, 'N': 6, 'O': 7, 'P': 2, 'Qu': 1, 'R': 5, 'S': 6, 'T': 9, 'U': 3, 'V': 2, 'W': 3, 'X': 1,
-                    'Y': 3, 'Z': 1}
-        self.letters = random.choices(list(alphabet.keys()), k=6, weights=list(alphabet.values()))
+    def generate_letters(self, distribution=None):
+        self.letters = (distribution or ENGLISH).sample(6)
 
     def roll_cube(self):
         self.top_letter = self.letters[random.randrange(6)]
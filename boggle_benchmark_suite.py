@@ -0,0 +1,211 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from boggle import Board, Boggle, Player
+from boggle_dictionary import load_words
+from boggle_interface_contract import BoggleInterface
+
+"""
+A regression harness for the hot paths in boggle.py.  Every case runs across a matrix of grid sizes, player counts and
+dictionary sizes, headless, and the results are written as JSON.  Given a stored baseline, the run fails if any case
+got slower than the baseline by more than the threshold:
+    python boggle_benchmark_suite.py --output results.json
+    python boggle_benchmark_suite.py --baseline results.json --threshold 0.25
+"""
+
+GRID_SIZES = [(1, 1), (4, 4), (10, 10), (3, 30), (50, 50), (100, 100)]
+QUICK_GRID_SIZES = [(1, 1), (4, 4), (10, 10)]
+PLAYER_COUNTS = [1, 2, 10, 50]
+QUICK_PLAYER_COUNTS = [1, 2, 10]
+DICTIONARY_SIZES = [1000, 10000, None]
+
+
+class ScriptedInterface(BoggleInterface):
+    """
+    A non-interactive interface: players are named Player 0, Player 1, ... and each turn submits words_per_turn words,
+    half of them traced along random paths across the Board and half picked from the dictionary.
+    """
+
+    def __init__(self, game_instance, player_count, vocabulary, words_per_turn=20, seed=0):
+        """
+        :param vocabulary: A sorted list of dictionary words to pick from
+        """
+        super().__init__(game_instance)
+        self.player_count = player_count
+        self.vocabulary = vocabulary
+        self.words_per_turn = words_per_turn
+        self.rng = random.Random(seed)
+
+    def get_player_names(self):
+        return [f'Player {n}' for n in range(self.player_count)]
+
+    def get_words(self, player):
+        board = self.game_instance.board
+        traced = [random_path(board, self.rng, self.rng.randint(3, 8)) for _ in range(self.words_per_turn // 2)]
+        picked = self.rng.sample(self.vocabulary, min(len(self.vocabulary), self.words_per_turn - len(traced)))
+        return [word.upper() for word in traced + picked]
+
+
+def random_path(board, rng, length):
+    faces = board.faces()
+    path = [rng.randrange(len(faces))]
+    while len(path) < length:
+        options = [x for x in board.adjacency[path[-1]] if x not in path]
+        if not options:
+            break
+        path.append(rng.choice(options))
+    return ''.join(faces[x] for x in path)
+
+
+def best_time(func, repeat):
+    """
+    :return: The fastest of repeat runs of func, in seconds, which is the least noisy estimate of its cost
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def sized_dictionary(dictionary, size, directory):
+    """
+    :return: The path of a copy of dictionary cut down to its first size words (or dictionary itself if size is None)
+    """
+    if size is None:
+        return dictionary
+    path = os.path.join(directory, f'words_{size}.txt')
+    if not os.path.exists(path):
+        words = [x for x in open(dictionary, 'r').read().split('\n') if x]
+        with open(path, 'w') as handle:
+            handle.write('\n'.join(words[:size]))
+    return path
+
+
+def case_build_boggle_words(dictionary, grid_size, repeat):
+    game = Boggle(grid_size, 1, dictionary=dictionary)
+    return best_time(lambda: load_words(dictionary, game.scoring_model[1][0], game.x_width * game.y_width), repeat)
+
+
+def case_board_init(grid_size, repeat):
+    return best_time(lambda: Board(grid_size), repeat)
+
+
+def case_find_word(dictionary, grid_size, repeat, words=50):
+    """
+    Times Boggle.find_word on words traced across the Board, the same words made invalid, and words picked from the
+    dictionary, so both the dictionary lookup and the trace are measured.  The dictionary is loaded before timing.
+    """
+    game = Boggle(grid_size, 1, dictionary=dictionary)
+    rng = random.Random(0)
+    traced = [random_path(game.board, rng, rng.randint(3, 10)).upper() for _ in range(words)]
+    missing = [word + '#' for word in traced]
+    vocabulary = sorted(game.boggle_words)
+    picked = [word.upper() for word in rng.sample(vocabulary, min(len(vocabulary), words))]
+    return best_time(lambda: [game.find_word(word) for word in traced + missing + picked], repeat)
+
+
+def case_score_round(dictionary, player_count, repeat, words_per_player=100):
+    game = Boggle((10, 10), 1, dictionary=dictionary)
+    vocabulary = sorted(game.boggle_words)[:3 * words_per_player]
+
+    def score_round():
+        rng = random.Random(player_count)
+        game.players = [Player(f'Player {n}') for n in range(player_count)]
+        for player in game.players:
+            player.build_score_dict(1)
+            player.words[0] = game.scorer.score_words(rng.sample(vocabulary, min(len(vocabulary), words_per_player)))
+        game.score_round()
+
+    return best_time(score_round, repeat)
+
+
+def case_run_game(dictionary, grid_size, player_count, repeat, rounds=2):
+    vocabulary = sorted(Boggle(grid_size, rounds, dictionary=dictionary).boggle_words)
+
+    def run_game():
+        game = Boggle(grid_size, rounds, dictionary=dictionary, max_players=player_count)
+        game.interface = ScriptedInterface(game, player_count, vocabulary)
+        game.add_players()
+        game.run_game()
+
+    return best_time(run_game, repeat)
+
+
+def run_suite(dictionary, quick=False, repeat=3):
+    """
+    :return: A dict mapping each case name to its best time in seconds
+    """
+    grid_sizes = QUICK_GRID_SIZES if quick else GRID_SIZES
+    player_counts = QUICK_PLAYER_COUNTS if quick else PLAYER_COUNTS
+    results = {}
+    for grid_size in grid_sizes:
+        results[f'board_init[grid={grid_size[0]}x{grid_size[1]}]'] = case_board_init(grid_size, repeat)
+    with tempfile.TemporaryDirectory() as directory:
+        for size in DICTIONARY_SIZES:
+            path = sized_dictionary(dictionary, size, directory)
+            words = size or 'full'
+            results[f'build_boggle_words[words={words}]'] = case_build_boggle_words(path, (10, 10), repeat)
+            for grid_size in grid_sizes:
+                grid = f'{grid_size[0]}x{grid_size[1]}'
+                results[f'find_word[words={words},grid={grid}]'] = case_find_word(path, grid_size, repeat)
+                for player_count in player_counts:
+                    results[f'run_game[words={words},grid={grid},players={player_count}]'] = case_run_game(
+                        path, grid_size, player_count, repeat)
+            for player_count in player_counts:
+                results[f'score_round[words={words},players={player_count}]'] = case_score_round(path, player_count,
+                                                                                                 repeat)
+    return results
+
+
+def find_regressions(results, baseline, threshold, floor):
+    """
+    :param threshold: The fraction by which a case may be slower than its baseline, e.g. 0.25 for 25%
+    :param floor: Cases faster than this many seconds in both runs are too noisy to judge and are skipped
+    :return: A list of (case, baseline seconds, current seconds) for every case that regressed
+    """
+    regressions = []
+    for case, seconds in sorted(results.items()):
+        previous = baseline.get(case)
+        if previous is None or max(previous, seconds) < floor:
+            continue
+        if seconds > previous * (1 + threshold):
+            regressions.append((case, previous, seconds))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the boggle.py benchmark matrix and check it against a baseline')
+    parser.add_argument('--dictionary', default='boggle_words.txt')
+    parser.add_argument('--output', help='write the results to this JSON file')
+    parser.add_argument('--baseline', help='a JSON file written by an earlier --output run')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed slowdown, as a fraction')
+    parser.add_argument('--floor', type=float, default=0.001, help='ignore cases faster than this many seconds')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--quick', action='store_true', help='only run the smaller grid sizes and player counts')
+    args = parser.parse_args(argv)
+    results = run_suite(args.dictionary, quick=args.quick, repeat=args.repeat)
+    report = {'python': sys.version.split()[0], 'platform': platform.platform(), 'results': results}
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(report, handle, indent=2, sort_keys=True)
+    else:
+        print(json.dumps(report, indent=2, sort_keys=True))
+    if args.baseline:
+        baseline = json.load(open(args.baseline, 'r'))['results']
+        regressions = find_regressions(results, baseline, args.threshold, args.floor)
+        for case, previous, seconds in regressions:
+            print(f'REGRESSION {case}: {previous * 1000:.2f} ms -> {seconds * 1000:.2f} ms', file=sys.stderr)
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
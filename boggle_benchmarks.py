@@ -0,0 +1,666 @@
+import argparse
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from boggle import ALPHABET, Board, Boggle, CompactBoard, LetterDistribution, Player, search_paths
+from boggle_dictionary import CompiledDictionary, Trie, compile_dictionary
+from boggle_benchmark_suite import ScriptedInterface
+from boggle_generator import BoardBatch, BoardGenerator
+from boggle_instrumentation import Instrumentation
+from boggle_optimizer import BoardOptimizer
+from boggle_simulation import LengthBiasedSkill, UniformSkill, simulate
+from boggle_sharded import ShardedSolver
+from boggle_snapshot import SnapshotReader, write_snapshots
+from boggle_solutions import SolutionCache
+
+"""
+Timing comparisons for the hot paths in boggle.py.  Each benchmark is a plain function that prints its results, and can
+be run from the command line, e.g.:
+    python boggle_benchmarks.py solver --dictionary boggle_words.txt
+"""
+
+
+def time_call(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def find_words_one_by_one(game):
+    return {word for word in game.boggle_words if game.find_word(word.upper())}
+
+
+def bench_solver(dictionary, grid_sizes=((4, 4), (6, 6), (10, 10))):
+    """
+    Compares Boggle.find_all_words against checking every dictionary word with Boggle.find_word.
+    """
+    for grid_size in grid_sizes:
+        game = Boggle(grid_size, 1, dictionary=dictionary)
+        _, trie_time = time_call(game.build_word_trie)
+        solved, solve_time = time_call(game.find_all_words)
+        brute, brute_time = time_call(find_words_one_by_one, game)
+        assert solved == brute, f'Solver disagrees with find_word on a {grid_size[0]}x{grid_size[1]} board'
+        print(f'{grid_size[0]}x{grid_size[1]}: {len(solved)} words | '
+              f'find_all_words {solve_time * 1000:.2f} ms (trie build {trie_time * 1000:.0f} ms, once per game) | '
+              f'per-word find_word {brute_time * 1000:.0f} ms | speedup {brute_time / solve_time:.0f}x')
+
+
+def legacy_trace_path(word, space, consumed_spaces):
+    """
+    The set-union, string-slicing search that Boggle.trace_path used before it moved to integer bitmasks.
+    """
+    if word[:len(space.cube.top_letter)] != space.cube.top_letter.upper():
+        return False
+    elif word == space.cube.top_letter.upper():
+        return True
+    else:
+        for neighbor in filter(lambda x: x not in consumed_spaces, space.adjacents):
+            if legacy_trace_path(word[len(space.cube.top_letter):], neighbor, consumed_spaces | {space}):
+                return True
+
+
+def legacy_trace_word(game, word):
+    return any(legacy_trace_path(word, space, set()) for row in game.board.spaces for space in row)
+
+
+def random_path_word(game, length):
+    """
+    :return: The letters along a random self-avoiding path of up to length Spaces, so the word is always on the Board
+    """
+    faces = game.board.faces()
+    index = random.randrange(len(faces))
+    path = [index]
+    while len(path) < length:
+        options = [x for x in game.board.adjacency[path[-1]] if x not in path]
+        if not options:
+            break
+        path.append(random.choice(options))
+    return ''.join(faces[x] for x in path).upper()
+
+
+def bench_trace(dictionary, grid_sizes=((10, 10), (3, 10)), words_per_board=200, repeat=5):
+    """
+    Compares Boggle.trace_word (bitmask search) with the legacy set-union trace_path, on words that are on the Board,
+    words whose last letter is missing and words that are not there at all.
+    """
+    random.seed(0)
+    for grid_size in grid_sizes:
+        game = Boggle(grid_size, 1, dictionary=dictionary)
+        words = [random_path_word(game, random.randint(3, 16)) for _ in range(words_per_board)]
+        words += [word + '#' for word in words] + ['#' + word for word in words]
+        assert [game.trace_word(word) for word in words] == [bool(legacy_trace_word(game, word)) for word in words]
+        _, new_time = time_call(lambda: [game.trace_word(word) for word in words * repeat])
+        _, old_time = time_call(lambda: [legacy_trace_word(game, word) for word in words * repeat])
+        calls = len(words) * repeat
+        print(f'{grid_size[0]}x{grid_size[1]}: bitmask {new_time / calls * 1e6:.1f} us/word | '
+              f'set-union {old_time / calls * 1e6:.1f} us/word | speedup {old_time / new_time:.1f}x')
+
+
+def legacy_search_board(game, trie, faces):
+    """
+    The recursive, bitmask-based search that Boggle.search_board used before it moved to explicit stacks.
+    """
+    found = set()
+
+    def extend_path(index, node, prefix, used):
+        node = trie.step(node, faces[index])
+        if node is None:
+            return
+        prefix += faces[index]
+        if trie.is_word(node):
+            found.add(prefix)
+        used |= 1 << index
+        for neighbor in game.board.adjacency[index]:
+            if not used >> neighbor & 1:
+                extend_path(neighbor, node, prefix, used)
+
+    for index in range(len(faces)):
+        extend_path(index, trie.root, '', 0)
+    return found
+
+
+def snake_word(game, length):
+    """
+    :return: The letters along a path that runs back and forth along every other row of the Board, stepping through the
+    row between at each end, up to length Spaces long.  Leaving a row free between passes means a word that could
+    also be traced along a slightly different path never blocks its own later letters, so tracing it is linear in length.
+    """
+    faces = game.board.faces()
+    x_width = game.x_width
+    path = []
+    for y in range(0, game.y_width, 2):
+        row = range(x_width) if y % 4 == 0 else range(x_width - 1, -1, -1)
+        path.extend(y * x_width + x for x in row)
+        if y + 1 < game.y_width:
+            path.append((y + 1) * x_width + row[-1])
+    return ''.join(faces[index] for index in path[:length]).upper()
+
+
+def bench_large_boards(dictionary, grid_sizes=((50, 50), (100, 100), (200, 200)), snake_length=1000,
+                       legacy_spaces=10000):
+    """
+    Times the explicit-stack solver and trace_word on large boards against the recursive search they replaced, and
+    traces a word snake_length letters long, which the recursive trace could not do within Python's recursion limit.
+    The recursive solver is only timed on boards of up to legacy_spaces Spaces.
+    """
+    for grid_size in grid_sizes:
+        game = Boggle(grid_size, 1, dictionary=dictionary, compact_board=True)
+        trie = game.build_word_trie()
+        faces = [face.lower() for face in game.board.faces()]
+        solved, new_time = time_call(game.search_board, trie, faces)
+        old_time = float('nan')
+        if len(faces) <= legacy_spaces:
+            legacy, old_time = time_call(legacy_search_board, game, trie, faces)
+            assert solved == legacy
+        word = snake_word(game, snake_length)
+        traced, trace_time = time_call(game.trace_word, word)
+        assert traced
+        try:
+            legacy_trace = 'ok' if legacy_trace_word(game, word) else 'not found'
+        except RecursionError:
+            legacy_trace = 'RecursionError'
+        print(f'{grid_size[0]}x{grid_size[1]}: solve {len(solved)} words in {new_time * 1000:.0f} ms '
+              f'(recursive {old_time * 1000:.0f} ms) | {len(word)} letter word traced in {trace_time * 1000:.1f} ms '
+              f'(recursive: {legacy_trace})')
+
+
+def bench_validate_words(dictionary, grid_sizes=((4, 4), (6, 6), (10, 10)), submitted=500):
+    """
+    Compares Boggle.validate_words with calling find_word on each word of a pasted list, where a third of the words are
+    on the Board and the rest are dictionary words picked at random.
+    """
+    random.seed(0)
+    for grid_size in grid_sizes:
+        game = Boggle(grid_size, 1, dictionary=dictionary)
+        on_board = sorted(game.find_all_words())
+        words = random.sample(on_board, min(len(on_board), submitted // 3))
+        words = [word.upper() for word in words + random.sample(sorted(game.boggle_words), submitted - len(words))]
+        batch, batch_time = time_call(game.validate_words, words)
+        single, single_time = time_call(lambda: {word: game.score_word(word) for word in words if game.find_word(word)})
+        assert batch == single
+        print(f'{grid_size[0]}x{grid_size[1]}: {len(words)} words, {len(batch)} valid | validate_words '
+              f'{batch_time * 1000:.2f} ms | find_word each {single_time * 1000:.2f} ms | '
+              f'speedup {single_time / batch_time:.1f}x')
+
+
+def reroll(board):
+    board.shuffle_cubes()
+    board.reassign_cubes()
+    board.shake_cubes()
+
+
+def bench_board(dictionary, grid_sizes=((50, 50), (100, 100), (200, 200))):
+    """
+    Compares building and re-rolling a Board against a CompactBoard.
+    """
+    for grid_size in grid_sizes:
+        board, board_build = time_call(Board, grid_size)
+        compact, compact_build = time_call(CompactBoard, grid_size)
+        _, board_reroll = time_call(reroll, board)
+        _, compact_reroll = time_call(reroll, compact)
+        _, board_faces = time_call(board.faces)
+        _, compact_faces = time_call(compact.faces)
+        print(f'{grid_size[0]}x{grid_size[1]}: build Board {board_build * 1000:.1f} ms, CompactBoard '
+              f'{compact_build * 1000:.1f} ms | re-roll {board_reroll * 1000:.1f} ms, {compact_reroll * 1000:.1f} ms | '
+              f'faces {board_faces * 1000:.1f} ms, {compact_faces * 1000:.1f} ms')
+
+
+def bench_board_batch(dictionary, grid_sizes=((4, 4), (6, 6)), count=20000):
+    """
+    Compares drawing count boards with BoardBatch against building a Board for each.
+    """
+    for grid_size in grid_sizes:
+        batch, draw_time = time_call(BoardBatch, count, grid_size, seed=0)
+        _, faces_time = time_call(lambda: [batch.faces(n) for n in range(count)])
+        _, compact_time = time_call(lambda: [batch[n] for n in range(count)])
+        _, board_time = time_call(lambda: [Board(grid_size).faces() for _ in range(count)])
+        print(f'{grid_size[0]}x{grid_size[1]}, {count} boards: BoardBatch draw {draw_time * 1000:.0f} ms + faces '
+              f'{faces_time * 1000:.0f} ms ({count / (draw_time + faces_time):.0f} boards/s) or + CompactBoard '
+              f'{compact_time * 1000:.0f} ms | Board() each {board_time * 1000:.0f} ms ({count / board_time:.0f} boards/s)')
+
+
+def bench_generate_boards(dictionary, grid_size=(4, 4), count=200, min_words=40, workers=None):
+    """
+    Streams boards with at least min_words words from a BoardGenerator and reports each worker's throughput.
+    """
+    generator = BoardGenerator(grid_size, min_words=min_words, dictionary=dictionary, workers=workers, seed=0)
+    boards, elapsed = time_call(lambda: list(generator.generate(count)))
+    checked = sum(stats[0] for stats in generator.worker_stats.values())
+    print(f'{grid_size[0]}x{grid_size[1]}, >= {min_words} words: {len(boards)} of {checked} candidates accepted in '
+          f'{elapsed:.2f} s ({len(boards) / elapsed:.0f} accepted boards/s) with {generator.workers} workers')
+    for pid, rate in sorted(generator.throughput().items()):
+        print(f'  worker {pid}: {rate:.0f} candidate boards/s')
+
+
+def legacy_score_round(game):
+    """
+    The list-concatenating Boggle.score_round that preceded the Counter-based one.
+    """
+    for player in game.players:
+        op_words = sum([list(x.words[game.current_round].keys()) for x in game.players if x is not player], [])
+        for word in player.words[game.current_round]:
+            if word in op_words:
+                player.words[game.current_round][word] = 0
+        player.compute_score(game.current_round)
+
+
+def seat_players(game, player_count, words_per_player, vocabulary):
+    rng = random.Random(player_count)
+    game.players = [Player(f'Player {n}') for n in range(player_count)]
+    for player in game.players:
+        player.build_score_dict(game.max_rounds)
+        player.words[0] = {word: game.score_word(word) for word in rng.sample(vocabulary, words_per_player)}
+
+
+def bench_sharded_solver(dictionary, grid_sizes=((50, 50), (100, 100)), worker_counts=None):
+    """
+    Times ShardedSolver on one large Board with 1, 2, 4, ... workers, up to the number of CPUs, against the
+    single-process Boggle.find_all_words.
+    """
+    cpus = os.cpu_count()
+    worker_counts = worker_counts or [2 ** n for n in range(cpus.bit_length()) if 2 ** n < cpus] + [cpus]
+    for grid_size in grid_sizes:
+        game = Boggle(grid_size, 1, dictionary=dictionary, compact_board=True)
+        game.build_word_trie()
+        serial, serial_time = time_call(game.find_all_words)
+        print(f'{grid_size[0]}x{grid_size[1]}: find_all_words {serial_time * 1000:.0f} ms, {len(serial)} words')
+        for workers in worker_counts:
+            solver = ShardedSolver(game, workers=workers)
+            solver.warm_up()
+            sharded, sharded_time = time_call(solver.find_all_words, game)
+            solver.close()
+            assert sharded == serial
+            print(f'  {workers} workers: {sharded_time * 1000:.0f} ms | speedup {serial_time / sharded_time:.2f}x | '
+                  f'efficiency {serial_time / sharded_time / workers:.0%}')
+
+
+BIGRAM_DICE = dict(ALPHABET, Th=4, He=3, In=3, Er=3, An=3, Re=2, On=2, At=2)
+
+
+def bench_letter_distribution(dictionary, grid_sizes=((6, 6), (20, 20)), cubes=200000):
+    """
+    Compares drawing Cube faces through LetterDistribution's alias table with random.choices over the ALPHABET dict,
+    and solving boards rolled from a dice set with many two-letter faces with and without Trie token shortcuts.
+    """
+    _, legacy = time_call(lambda: [random.choices(list(ALPHABET.keys()), k=6, weights=list(ALPHABET.values()))
+                                   for _ in range(cubes)])
+    distribution = LetterDistribution(ALPHABET)
+    _, alias = time_call(lambda: [distribution.sample(6) for _ in range(cubes)])
+    _, bulk = time_call(distribution.sample, 6 * cubes)
+    print(f'{cubes} cubes: random.choices {legacy / cubes * 1e6:.2f} us/cube | alias table '
+          f'{alias / cubes * 1e6:.2f} us/cube, {bulk / cubes * 1e6:.2f} us/cube in one call')
+    bigrams = LetterDistribution(BIGRAM_DICE)
+    for grid_size in grid_sizes:
+        game = Boggle(grid_size, 1, dictionary=dictionary, distribution=bigrams)
+        plain = Trie(game.boggle_words)
+        shortcut = bigrams.build_trie(game.boggle_words)
+        faces = [face.lower() for face in game.board.faces()]
+        starts = range(len(faces))
+        words, plain_time = time_call(search_paths, plain, faces, game.board.adjacency, starts)
+        shortcut_words, shortcut_time = time_call(search_paths, shortcut, faces, game.board.adjacency, starts)
+        assert words == shortcut_words
+        print(f'{grid_size[0]}x{grid_size[1]} bigram dice: {len(words)} words | character Trie '
+              f'{plain_time * 1000:.1f} ms | token shortcuts {shortcut_time * 1000:.1f} ms | '
+              f'speedup {plain_time / shortcut_time:.2f}x')
+
+
+def bench_optimizer(dictionary, grid_sizes=((4, 4), (5, 5), (10, 10)), mutations=1000):
+    """
+    Compares keeping a Board's score up to date with IncrementalSolver against solving the whole Board again after
+    every mutation, in mutations per second.
+    """
+    for grid_size in grid_sizes:
+        game = Boggle(grid_size, 1, dictionary=dictionary)
+        optimizer = BoardOptimizer(game, seed=0)
+        _, incremental = time_call(lambda: [(optimizer.mutate(), optimizer.solver.score)[1]
+                                                 for _ in range(mutations)])
+        assert optimizer.solver.words == game.find_all_words()
+        rng = random.Random(0)
+        spaces = [space for row in game.board.spaces for space in row]
+
+        def full_solve():
+            totals = []
+            for _ in range(mutations):
+                if rng.random() < 0.5:
+                    first, second = rng.sample(spaces, 2)
+                    first.cube, second.cube = second.cube, first.cube
+                else:
+                    cube = rng.choice(spaces).cube
+                    cube.top_letter = rng.choice(cube.letters)
+                totals.append(game.scorer.total(game.find_all_words()))
+            return totals
+
+        _, full = time_call(full_solve)
+        print(f'{grid_size[0]}x{grid_size[1]}: incremental {mutations / incremental:.0f} mutations/s | full re-solve '
+              f'{mutations / full:.0f} mutations/s | speedup {full / incremental:.2f}x')
+
+
+SPARSE_DICE = {'A': 3, 'E': 3, 'S': 2, 'T': 2, 'R': 1, 'N': 1}
+UNUSUAL_DICE = {'A': 3, 'O': 3, 'Ll': 1, 'Ch': 1, 'X': 1, 'Z': 1, 'K': 1}
+
+
+def bench_signature_index(dictionary, grid_sizes=((4, 4), (6, 6), (10, 10)), repeat=10):
+    """
+    Compares solving sparse and unusual-alphabet Boards against the whole dictionary Trie with solving them against a
+    Trie of the words the SignatureIndex says their faces could spell.
+    """
+    game = Boggle((4, 4), 1, dictionary=dictionary)
+    index, build = time_call(game.load_dictionary().build_signature_index)
+    print(f'index: {len(index.buckets)} buckets, built in {build * 1000:.0f} ms '
+          f'(once per dictionary)')
+    for name, weights in (('sparse', SPARSE_DICE), ('unusual', UNUSUAL_DICE)):
+        distribution = LetterDistribution(weights)
+        for grid_size in grid_sizes:
+            game = Boggle(grid_size, 1, dictionary=dictionary, distribution=distribution)
+            trie = game.build_word_trie()
+            game.find_all_words()
+            full_time = candidate_time = 0
+            for _ in range(repeat):
+                game.board.shake_cubes()
+                faces = [face.lower() for face in game.board.faces()]
+                found, elapsed = time_call(game.search_board, trie, faces)
+                full_time += elapsed
+                words, elapsed = time_call(game.find_all_words)
+                candidate_time += elapsed
+                assert words == {word for word in found if word in game.boggle_words}
+            print(f'{name} {grid_size[0]}x{grid_size[1]}: {len(game.candidate_words())} candidates | whole Trie '
+                  f'{full_time / repeat * 1000:.1f} ms | candidate Trie {candidate_time / repeat * 1000:.1f} ms '
+                  f'(lookup and Trie build included) | speedup {full_time / candidate_time:.2f}x')
+
+
+def bench_snapshot(dictionary, grid_size=(4, 4), count=2000, solved=200):
+    """
+    Compares rebuilding boards from a snapshot file with the usual way of recreating a known board: building a Boggle
+    instance and setting every Space's top_letter.
+    """
+    batch = BoardBatch(count, grid_size, seed=0)
+    game = Boggle(grid_size, 1, dictionary=dictionary, compact_board=True)
+    solutions = []
+    for n in range(count):
+        game.board = batch[n]
+        solutions.append(game.find_all_words() if n < solved else None)
+    path = os.path.join(tempfile.mkdtemp(), 'boards.bogs')
+    _, write_time = time_call(write_snapshots, path, batch, solutions)
+    print(f'write: {count} boards ({solved} with solutions) in {write_time * 1000:.0f} ms, '
+          f'{os.path.getsize(path) / count:.0f} bytes/board')
+    reader = SnapshotReader(path)
+    assert all(reader.faces(n) == batch.faces(n) and reader.words(n) == (solutions[n] and frozenset(solutions[n]))
+               for n in range(count))
+    faces = [batch.faces(n) for n in range(count)]
+
+    def poke(n):
+        rebuilt = Boggle(grid_size, 1, dictionary=dictionary)
+        for space, face in zip([space for row in rebuilt.board.spaces for space in row], faces[n]):
+            space.cube.top_letter = face
+        return rebuilt
+
+    for name, load in (('faces', reader.faces), ('CompactBoard', lambda n: reader.board(n, compact=True)),
+                       ('Board', reader.board), ('words', reader.words),
+                       ('Boggle', lambda n: reader.game(n, dictionary=dictionary)),
+                       ('Boggle + top_letter', poke)):
+        _, elapsed = time_call(lambda: [load(n) for n in range(count)])
+        print(f'{name:>20}: {elapsed / count * 1e6:8.1f} us/board')
+    reader.close()
+    os.remove(path)
+
+
+def bench_score_round(dictionary, player_counts=(2, 10, 20, 50, 100), words_per_player=100):
+    """
+    Compares Boggle.score_round with the legacy implementation as the number of players grows.  Players draw their
+    words from a shared pool of three times words_per_player, so plenty of words are found by more than one player.
+    """
+    random.seed(0)
+    game = Boggle((10, 10), 1, dictionary=dictionary)
+    vocabulary = random.sample(sorted(game.boggle_words), 3 * words_per_player)
+    for player_count in player_counts:
+        seat_players(game, player_count, words_per_player, vocabulary)
+        _, new_time = time_call(game.score_round)
+        expected = [(player.score, player.words) for player in game.players]
+        seat_players(game, player_count, words_per_player, vocabulary)
+        _, old_time = time_call(legacy_score_round, game)
+        assert expected == [(player.score, player.words) for player in game.players]
+        print(f'{player_count} players x {words_per_player} words: Counter {new_time * 1000:.2f} ms | '
+              f'legacy {old_time * 1000:.2f} ms | speedup {old_time / new_time:.1f}x')
+
+
+def legacy_score_word(scoring_model, word):
+    for idx, tup in enumerate(scoring_model):
+        if len(word) < tup[0]:
+            return scoring_model[idx - 1][1]
+    return scoring_model[-1][1]
+
+
+def bench_score_word(dictionary, word_count=200000):
+    """
+    Compares the Scorer lookup table with the linear scan over scoring_model it replaced.
+    """
+    game = Boggle((10, 10), 1, dictionary=dictionary)
+    words = (sorted(game.boggle_words) * (word_count // len(game.boggle_words) + 1))[:word_count]
+    scoring_model = game.scoring_model
+    _, legacy_time = time_call(lambda: [legacy_score_word(scoring_model, word) for word in words])
+    _, single_time = time_call(lambda: [game.score_word(word) for word in words])
+    _, batch_time = time_call(game.scorer.score_words, words)
+    _, total_time = time_call(game.scorer.total, words)
+    print(f'{word_count} words: linear scan {legacy_time * 1000:.0f} ms | score_word {single_time * 1000:.0f} ms | '
+          f'Scorer.score_words {batch_time * 1000:.0f} ms | Scorer.total {total_time * 1000:.0f} ms')
+
+
+def bench_solution_cache(dictionary, grid_size=(5, 5), boards=50):
+    """
+    Solves a set of boards, then solves them again (as a rotation) through a SolutionCache with an sqlite tier.
+    """
+    game = Boggle(grid_size, 1, dictionary=dictionary)
+    game.build_word_trie()
+    batch = BoardBatch(boards, grid_size, seed=0)
+    database = os.path.join(tempfile.mkdtemp(), 'solutions.sqlite')
+    cache = SolutionCache(path=database)
+
+    def solve_all(rotate):
+        for n in range(boards):
+            game.board = batch[n]
+            if rotate:
+                faces = game.board.faces()
+                for index, space in enumerate(row_space for row in game.board.spaces for row_space in row):
+                    space.cube.top_letter = faces[len(faces) - 1 - index]
+            game.solve(cache)
+
+    _, cold = time_call(solve_all, False)
+    _, warm = time_call(solve_all, True)
+    cache.close()
+    _, disk = time_call(lambda: [SolutionCache(path=database).solve(game) for _ in range(boards)])
+    print(f'{boards} {grid_size[0]}x{grid_size[1]} boards: solve {cold / boards * 1000:.2f} ms/board | rotated, '
+          f'from memory {warm / boards * 1000:.3f} ms/board | from sqlite {disk / boards * 1000:.3f} ms/board')
+    os.remove(database)
+
+
+def bench_instrumentation(dictionary, grid_size=(6, 6), players=4, rounds=5, games=20):
+    """
+    Times scripted games without instrumentation and with it, and prints the last game's phase breakdown.
+    """
+    vocabulary = sorted(Boggle(grid_size, 1, dictionary=dictionary).boggle_words)
+
+    def play(instrumentation):
+        for _ in range(games):
+            game = Boggle(grid_size, rounds, dictionary=dictionary, max_players=players, instrumentation=instrumentation)
+            game.interface = ScriptedInterface(game, players, vocabulary)
+            game.add_players()
+            game.run_game()
+
+    instrumentation = Instrumentation()
+    _, off = time_call(play, None)
+    _, on = time_call(play, instrumentation)
+    print(f'{games} games: off {off / games * 1000:.2f} ms/game | on {on / games * 1000:.2f} ms/game '
+          f'({(on - off) / off * 100:+.1f}%)')
+    record = instrumentation.sink.records[-1]
+    print('last game: ' + ', '.join(f'{name} {seconds * 1000:.2f} ms' for name, seconds in record['phases'].items()) +
+          f', {record["counters"]["search_nodes"]} search nodes, prune rate {record["prune_rate"]:.0%}')
+
+
+def bench_simulation(dictionary, grid_size=(4, 4), games=500, rounds=3, workers=None):
+    """
+    Simulates games between three bots headlessly and reports games and solved boards per second.
+    """
+    skills = [UniformSkill(0.2), UniformSkill(0.4), LengthBiasedSkill(0.6)]
+    stats, elapsed = time_call(lambda: list(simulate(games, grid_size, skills, rounds=rounds, dictionary=dictionary,
+                                                     workers=workers, chunk_size=50))[-1])
+    summary = stats.summary()
+    print(f'{games} games of {rounds} rounds on {grid_size[0]}x{grid_size[1]}: {elapsed:.2f} s '
+          f'({games / elapsed:.0f} games/s, {stats.rounds / elapsed:.0f} boards/s), shared word rate '
+          f'{summary["shared_word_rate"]:.0%}, mean scores ' + ', '.join(f'{x:.1f}' for x in summary['mean_scores']))
+
+
+LOAD_SCRIPT = '''
+import resource, sys, time
+sys.path.insert(0, {root!r})
+from boggle import Board, Boggle, CompactBoard, Player
+
+
+def rss():
+    try:
+        return int(next(x for x in open('/proc/self/status') if x.startswith('VmRSS')).split()[1])
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+before = rss()
+start = time.perf_counter()
+words = {loader}
+elapsed = time.perf_counter() - start
+print(elapsed, rss() - before)
+'''
+
+
+def measure_load(loader):
+    """
+    Loads a dictionary in a fresh interpreter, so that neither the timing nor the peak RSS is skewed by earlier loads.
+    :param loader: A Python expression that loads the dictionary
+    :return: (seconds taken, growth of the RSS in KiB)
+    """
+    script = LOAD_SCRIPT.format(root=os.path.dirname(os.path.abspath(__file__)), loader=loader)
+    output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True).stdout
+    elapsed, rss = output.split()
+    return float(elapsed), int(rss)
+
+
+def bench_dictionary_load(dictionary):
+    """
+    Compares the set-based Boggle.build_boggle_words loader with opening a CompiledDictionary.
+    """
+    compiled = os.path.join(tempfile.mkdtemp(), 'words' + CompiledDictionary.SUFFIX)
+    _, compile_time = time_call(compile_dictionary, dictionary, compiled)
+    print(f'compile: {compile_time * 1000:.0f} ms, {os.path.getsize(dictionary) / 1024:.0f} KiB word list -> '
+          f'{os.path.getsize(compiled) / 1024:.0f} KiB compiled (one-off)')
+    set_time, set_rss = measure_load(f'Boggle((6, 6), 1, dictionary={dictionary!r}).boggle_words')
+    mmap_time, mmap_rss = measure_load(f'Boggle((6, 6), 1, dictionary={compiled!r}).boggle_words')
+    print(f'set loader:      {set_time * 1000:8.2f} ms, +{set_rss / 1024:.1f} MiB RSS')
+    print(f'compiled loader: {mmap_time * 1000:8.2f} ms, +{mmap_rss / 1024:.1f} MiB RSS')
+    game = Boggle((6, 6), 1, dictionary=compiled)
+    words = Boggle((6, 6), 1, dictionary=dictionary).boggle_words
+    assert all(word in game.boggle_words for word in words)
+    _, set_lookup = time_call(lambda: [word in words for word in words])
+    _, mmap_lookup = time_call(lambda: [game.check_if_valid_english(word) for word in words])
+    print(f'lookups: set {set_lookup / len(words) * 1e9:.0f} ns/word, compiled {mmap_lookup / len(words) * 1e9:.0f} ns/word')
+    os.remove(compiled)
+
+
+STARTUP_SCRIPT = '''
+import sys
+sys.path.insert(0, {root!r})
+from boggle import Boggle
+game = Boggle(grid_size=(6, 6), max_rounds=1, max_players=2, dictionary={dictionary!r})
+if {eager!r}:
+    game.boggle_words
+    game.board.generate_adjacents()
+game.add_players()
+game.run_game()
+'''
+
+
+def time_to_first_board(dictionary, eager):
+    """
+    Starts a game in a fresh interpreter, as python boggle.py does, and times it until the first row of the Board has
+    been printed.
+    :param eager: Load the dictionary and link every Space to its neighbours before asking for names, as Boggle did
+    before both were made lazy
+    """
+    script = STARTUP_SCRIPT.format(root=os.path.dirname(os.path.abspath(__file__)), dictionary=dictionary, eager=eager)
+    start = time.perf_counter()
+    process = subprocess.Popen([sys.executable, '-c', script], stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    process.stdin.write(b'Ann\nBob\n')
+    process.stdin.flush()
+    output = b''
+    while output.count(b'? ') < 2 or b'\n' not in output.split(b'? ', 2)[-1]:
+        chunk = os.read(process.stdout.fileno(), 4096)
+        if not chunk:
+            break
+        output += chunk
+    elapsed = time.perf_counter() - start
+    process.kill()
+    process.wait()
+    return elapsed
+
+
+def bench_startup(dictionary, runs=5, instances=1000):
+    """
+    Compares the lazy Boggle with an eager equivalent: the time python boggle.py takes to show its first Board, and
+    the time and memory it takes to construct many Boggle instances that are never played.
+    """
+    for eager in (True, False):
+        best = min(time_to_first_board(dictionary, eager) for _ in range(runs))
+        print(f'{"eager" if eager else "lazy":5} first board: {best * 1000:.0f} ms')
+    Boggle((4, 4), 1, dictionary=dictionary).boggle_words
+    for eager in (True, False):
+        def construct():
+            games = []
+            for _ in range(instances):
+                game = Boggle((4, 4), 1, dictionary=dictionary)
+                if eager:
+                    game.boggle_words
+                    game.board.generate_adjacents()
+                games.append(game)
+            return games
+
+        tracemalloc.start()
+        games, elapsed = time_call(construct)
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del games
+        print(f'{"eager" if eager else "lazy":5} idle instances: {elapsed / instances * 1e6:.0f} us, '
+              f'{size / instances:.0f} bytes each')
+
+
+BENCHMARKS = {
+    'board': bench_board,
+    'board_batch': bench_board_batch,
+    'generate_boards': bench_generate_boards,
+    'instrumentation': bench_instrumentation,
+    'large_boards': bench_large_boards,
+    'letter_distribution': bench_letter_distribution,
+    'optimizer': bench_optimizer,
+    'score_round': bench_score_round,
+    'score_word': bench_score_word,
+    'sharded_solver': bench_sharded_solver,
+    'signature_index': bench_signature_index,
+    'simulation': bench_simulation,
+    'snapshot': bench_snapshot,
+    'solution_cache': bench_solution_cache,
+    'solver': bench_solver,
+    'startup': bench_startup,
+    'dictionary_load': bench_dictionary_load,
+    'trace': bench_trace,
+    'validate_words': bench_validate_words,
+}
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the hot paths in boggle.py')
+    parser.add_argument('benchmarks', nargs='*', choices=sorted(BENCHMARKS), default=sorted(BENCHMARKS))
+    parser.add_argument('--dictionary', default='boggle_words.txt')
+    args = parser.parse_args()
+    for name in args.benchmarks:
+        print(f'== {name} ==')
+        BENCHMARKS[name](dictionary=args.dictionary)
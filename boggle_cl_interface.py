@@ -39,4 +39,9 @@ class BoggleInterface:
 
     def display_final_scores(self):
         for player in self.game_instance.players:
-            print(f'{player.name}: {player.score} - {player.words}')
+            if self.game_instance.history is None:
+                print(f'{player.name}: {player.score} - {player.words}')
+            else:
+                print(f'{player.name}: {player.score}')
+        if self.game_instance.history is not None:
+            print(f'Every round is logged in {self.game_instance.history.path}')
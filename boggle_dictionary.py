@@ -0,0 +1,469 @@
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from collections import Counter, OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+
+class Trie:
+    """
+    A prefix tree over the words of a Boggle dictionary.
+
+    Each node is a dict mapping a single character to its child node.  A node that completes a word holds the WORD_END
+    key.  add_tokens adds multi-character face tokens (e.g. 'qu') as extra keys, each leading straight to the node its
+    characters lead to, so stepping over such a face is one lookup.
+    """
+
+    WORD_END = None
+
+    def __init__(self, words=(), tokens=()):
+        """
+        :param tokens: Multi-character face tokens to add shortcuts for, as with add_tokens
+        """
+        self.root = {}
+        self.longest = 0
+        self.tokens = {token for token in tokens if len(token) > 1}
+        for word in words:
+            self.add(word)
+
+    def add(self, word):
+        self.longest = max(self.longest, len(word))
+        node = self.root
+        for char in word:
+            node = node.setdefault(char, {})
+        node[self.WORD_END] = True
+        if self.tokens and any(token in word for token in self.tokens):
+            path = [self.root]
+            for char in word:
+                path.append(path[-1][char])
+            for token in self.tokens:
+                start = word.find(token)
+                while start >= 0:
+                    path[start][token] = path[start + len(token)]
+                    start = word.find(token, start + 1)
+
+    def add_tokens(self, tokens):
+        """
+        Adds a shortcut key for every multi-character token, at every node where the token's characters lead somewhere,
+        and keeps adding them as more words are added.  A node then holds a token exactly when its characters would
+        lead on from it, so the node reached by any face that is a single character or one of tokens is node.get(face).
+        :param tokens: Face tokens, in the same case as the words
+        """
+        tokens = [token for token in tokens if len(token) > 1 and token not in self.tokens]
+        self.tokens.update(tokens)
+        pending = [self.root]
+        while pending and tokens:
+            node = pending.pop()
+            pending.extend(child for key, child in node.items() if key is not self.WORD_END and len(key) == 1)
+            for token in tokens:
+                child = node
+                for char in token:
+                    child = child.get(char)
+                    if child is None:
+                        break
+                else:
+                    node[token] = child
+
+    def step(self, node, token):
+        """
+        :param node: A node previously returned by this Trie (or its root)
+        :param token: A face of a Cube, which may be more than one character long (e.g. 'qu')
+        :return: The node reached by following every character of token, or None if no word continues that way
+        """
+        child = node.get(token)
+        if child is not None or len(token) == 1:
+            return child
+        for char in token:
+            node = node.get(char)
+            if node is None:
+                return None
+        return node
+
+    def is_word(self, node):
+        return self.WORD_END in node
+
+    def __contains__(self, word):
+        node = self.step(self.root, word)
+        return node is not None and self.WORD_END in node
+
+
+class CompiledDictionary:
+    """
+    A read-only dictionary backed by a file written by compile_dictionary.
+
+    The file is a minimized, array-backed trie (a DAWG) over the UTF-8 bytes of each lowercase word, and is opened
+    with mmap, so loading it copies nothing and every process that opens the same file shares one copy in the OS page
+    cache.  It offers the same root/step/is_word interface as Trie, plus exact-word lookups through `in`.
+
+    Layout:
+        header:   MAGIC, VERSION, node count, edge count, root node, word count (little-endian uint32)
+        nodes:    index of the node's first edge, edge count << 1 | 1 if the node completes a word (uint32 pairs)
+        children: the node each edge leads to (uint32 per edge)
+        labels:   the byte each edge consumes (one byte per edge, sorted within each node)
+    """
+
+    SUFFIX = '.bogd'
+    MAGIC = 0x444f4742
+    VERSION = 1
+    HEADER = struct.Struct('<6I')
+    LABELS = [bytes([x]) for x in range(256)]
+
+    def __init__(self, path, min_length=0, max_length=None):
+        """
+        :param path: A file written by compile_dictionary
+        :param min_length: Shorter words are treated as missing by `in`
+        :param max_length: Longer words are treated as missing by `in`
+        """
+        self.path = path
+        self.min_length = min_length
+        self.max_length = max_length
+        with open(path, 'rb') as handle:
+            self.buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, node_count, edge_count, self.root, self.word_count = self.HEADER.unpack_from(self.buffer)
+        if magic != self.MAGIC or version != self.VERSION:
+            raise ValueError(f'{path} is not a version {self.VERSION} compiled Boggle dictionary')
+        self.label_start = self.HEADER.size + 4 * (2 * node_count + edge_count)
+        if sys.byteorder == 'little':
+            self.cells = memoryview(self.buffer)[self.HEADER.size:self.label_start].cast('I')
+        else:
+            self.cells = array('I', self.buffer[self.HEADER.size:self.label_start])
+            self.cells.byteswap()
+        self.child_start = 2 * node_count
+        self.height = None
+        self.bounded_count = None
+
+    def step(self, node, token):
+        cells = self.cells
+        find = self.buffer.find
+        for byte in token.encode():
+            first = cells[2 * node]
+            start = self.label_start + first
+            edge = find(self.LABELS[byte], start, start + (cells[2 * node + 1] >> 1))
+            if edge < 0:
+                return None
+            node = cells[self.child_start + first + edge - start]
+        return node
+
+    def is_word(self, node):
+        return bool(self.cells[2 * node + 1] & 1)
+
+    @property
+    def longest(self):
+        """
+        :return: The length, in bytes, of the longest word, found the first time it is asked for from the longest path
+        through the trie.  compile_dictionary numbers every node after its children, so one pass in node order will do.
+        """
+        if self.height is None:
+            cells = self.cells
+            heights = array('I', bytes(4 * (self.child_start // 2)))
+            for node in range(self.child_start // 2):
+                first = self.child_start + cells[2 * node]
+                for child in cells[first:first + (cells[2 * node + 1] >> 1)]:
+                    heights[node] = max(heights[node], heights[child] + 1)
+            self.height = heights[self.root] if heights else 0
+            if self.max_length is not None:
+                self.height = min(self.height, self.max_length)
+        return self.height
+
+    def __contains__(self, word):
+        if len(word) < self.min_length or (self.max_length is not None and len(word) > self.max_length):
+            return False
+        node = self.step(self.root, word)
+        return node is not None and self.is_word(node)
+
+    def __len__(self):
+        """
+        :return: The number of words `in` accepts.  When the length bounds rule some out, they are counted by walking the
+        trie the first time this is asked for.
+        """
+        if self.bounded_count is None:
+            if self.min_length <= 1 and self.max_length is None:
+                self.bounded_count = self.word_count
+            else:
+                self.bounded_count = sum(1 for _ in self)
+        return self.bounded_count
+
+    def __iter__(self):
+        """
+        :return: A generator of every word that `in` accepts, found by walking the trie
+        """
+        cells, buffer = self.cells, self.buffer
+        pending = [(self.root, b'')]
+        while pending:
+            node, prefix = pending.pop()
+            if cells[2 * node + 1] & 1:
+                word = prefix.decode()
+                if self.min_length <= len(word) and (self.max_length is None or len(word) <= self.max_length):
+                    yield word
+            first = cells[2 * node]
+            labels = buffer[self.label_start + first:self.label_start + first + (cells[2 * node + 1] >> 1)]
+            for edge, label in enumerate(labels):
+                pending.append((cells[self.child_start + first + edge], prefix + self.LABELS[label]))
+
+    def close(self):
+        if isinstance(self.cells, memoryview):
+            self.cells.release()
+        self.buffer.close()
+
+
+class SignatureIndex:
+    """
+    The words of a dictionary filed by letter signature, to find the words a Board's faces could possibly spell without
+    looking at the rest.
+
+    Each word's signature is a bitmask of the characters it uses (one bit per character in the dictionary) plus the
+    count of every character it uses more than once.  Words are grouped into buckets keyed on the bitmask, so a Board
+    rules out every bucket needing a character it does not show, and then only the repeat counts of the words left are
+    checked.
+
+    Looking a Board up costs one bucket lookup per subset of the characters it shows, so it only pays when they are
+    few: on a Board showing more than SELECTIVE_CHARS distinct characters nearly every word fits.
+    """
+
+    SELECTIVE_CHARS = 10
+
+    def __init__(self, words):
+        self.bits = {}
+        self.buckets = {}
+        for word in words:
+            counts = Counter(word)
+            mask = 0
+            for char in counts:
+                mask |= 1 << self.bits.setdefault(char, len(self.bits))
+            repeats = tuple((char, count) for char, count in counts.items() if count > 1)
+            self.buckets.setdefault(mask, []).append((word, repeats))
+
+    def candidates(self, inventory):
+        """
+        :param inventory: A Counter of the characters showing on a Board, counting each character of a multi-character
+        face such as 'qu' separately, in the same case as the words
+        :return: A list of every word needing no more of any character than inventory holds
+        """
+        board = 0
+        for char in inventory:
+            if char in self.bits:
+                board |= 1 << self.bits[char]
+        buckets = self.buckets
+        if 1 << bin(board).count('1') < len(buckets):
+            masks, mask = [], board
+            while mask:
+                masks.append(mask)
+                mask = (mask - 1) & board
+        else:
+            masks = [mask for mask in buckets if not mask & ~board]
+        found = []
+        for mask in masks:
+            for word, repeats in buckets.get(mask, ()):
+                if not repeats or all(inventory[char] >= count for char, count in repeats):
+                    found.append(word)
+        return found
+
+
+def compile_dictionary(source, destination):
+    """
+    Writes the words of a newline separated word list to destination in the CompiledDictionary format.
+    :param source: A word list in the same format as boggle_words.txt
+    :param destination: The path of the compiled dictionary, conventionally ending in CompiledDictionary.SUFFIX
+    :return: The number of words written
+    """
+    words = {x.lower() for x in open(source, 'r').read().split('\n') if x}
+    trie = Trie(word.encode() for word in words)
+    nodes = array('I')
+    children = array('I')
+    labels = bytearray()
+    registry = {}
+
+    def register(node):
+        edges = tuple((byte, register(child)) for byte, child in sorted(
+            (key, value) for key, value in node.items() if key is not Trie.WORD_END))
+        signature = (Trie.WORD_END in node, edges)
+        if signature not in registry:
+            registry[signature] = len(nodes) // 2
+            nodes.extend((len(children), len(edges) << 1 | signature[0]))
+            for byte, child in edges:
+                labels.append(byte)
+                children.append(child)
+        return registry[signature]
+
+    root = register(trie.root)
+    if sys.byteorder != 'little':
+        nodes.byteswap()
+        children.byteswap()
+    with open(destination, 'wb') as handle:
+        handle.write(CompiledDictionary.HEADER.pack(CompiledDictionary.MAGIC, CompiledDictionary.VERSION,
+                                                    len(nodes) // 2, len(children), root, len(words)))
+        nodes.tofile(handle)
+        children.tofile(handle)
+        handle.write(labels)
+    return len(words)
+
+
+def load_words(path, min_length, max_length):
+    """
+    :return: The words in path that are between min_length and max_length long, as a frozenset of lowercase strings or,
+    if path is a compiled dictionary, a CompiledDictionary enforcing those bounds
+    """
+    if path.endswith(CompiledDictionary.SUFFIX):
+        return CompiledDictionary(path, min_length=min_length, max_length=max_length)
+    words = open(path, 'r').read().split('\n')
+    return frozenset(x.lower() for x in words if min_length <= len(x) <= max_length)
+
+
+class DictionaryEntry:
+    """
+    One loaded dictionary, shared by every Boggle instance using the same word list and length bounds.  Neither words
+    nor trie may be modified once built.
+    """
+
+    def __init__(self, words):
+        self.words = words
+        self.trie = None
+        self.signature_index = None
+        self.size = self.estimate_size(words)
+
+    def build_trie(self, tokens=()):
+        """
+        :param tokens: Multi-character face tokens to add shortcuts for (see Trie.add_tokens), in any case
+        """
+        tokens = [token.lower() for token in tokens]
+        if self.trie is None:
+            if isinstance(self.words, CompiledDictionary):
+                self.trie = self.words
+            else:
+                self.trie = Trie(self.words, tokens)
+                self.size += self.estimate_size(self.trie)
+        if isinstance(self.trie, Trie):
+            self.trie.add_tokens(tokens)
+        return self.trie
+
+    def build_signature_index(self):
+        if self.signature_index is None:
+            self.signature_index = SignatureIndex(self.words)
+            self.size += self.estimate_size(self.signature_index)
+        return self.signature_index
+
+    @staticmethod
+    def estimate_size(structure):
+        """
+        :return: An estimate, in bytes, of the memory held by a word set, Trie, SignatureIndex or CompiledDictionary
+        """
+        if isinstance(structure, SignatureIndex):
+            return sys.getsizeof(structure.buckets) + sum(
+                sys.getsizeof(bucket) + sys.getsizeof(entry) + sys.getsizeof(entry[1])
+                for bucket in structure.buckets.values() for entry in bucket)
+        if isinstance(structure, CompiledDictionary):
+            return len(structure.buffer)
+        if isinstance(structure, Trie):
+            size, pending = 0, [structure.root]
+            while pending:
+                node = pending.pop()
+                size += sys.getsizeof(node)
+                pending.extend(child for key, child in node.items() if key is not Trie.WORD_END and len(key) == 1)
+            return size
+        return sys.getsizeof(structure) + sum(sys.getsizeof(word) for word in structure)
+
+
+Prefetch = namedtuple('Prefetch', ['generation', 'future'])
+
+
+class DictionaryCache:
+    """
+    A process-wide, least recently used cache of DictionaryEntry objects, keyed on the dictionary's path, its
+    modification time and the word length bounds, so editing the word list on disk invalidates its entries.
+
+    Entries are evicted, oldest first, once their estimated sizes add up to more than max_bytes.  Tries count towards
+    the budget once they have been built.
+
+    prefetch runs get on one background thread shared by every caller, so a game can be set up, and the dictionary
+    loaded, before its first words need checking.
+    """
+
+    def __init__(self, max_bytes=512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.lock = threading.RLock()
+        self.loader = None
+        self.loader_lock = threading.Lock()
+        self.generation = 0
+
+    def forget_loader(self):
+        """
+        Runs in a forked child, which has no copy of the loader thread and may have copied a lock while it was held.
+        Prefetches started before the fork are never finished in the child, so wait loads their entries itself.
+        """
+        self.lock = threading.RLock()
+        self.loader = None
+        self.loader_lock = threading.Lock()
+        self.generation += 1
+
+    def get(self, path, min_length, max_length):
+        key = (os.path.abspath(path), os.stat(path).st_mtime_ns, min_length, max_length)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.hits += 1
+                self.entries.move_to_end(key)
+                return entry
+            self.misses += 1
+            entry = DictionaryEntry(load_words(path, min_length, max_length))
+            self.entries[key] = entry
+            self.evict()
+            return entry
+
+    def prefetch(self, path, min_length, max_length):
+        """
+        Starts get(path, min_length, max_length) on the background loader, so it counts as a hit or a miss like any
+        other get.
+        :return: A Prefetch to pass to wait
+        """
+        with self.loader_lock:
+            if self.loader is None:
+                if self.generation == 0:
+                    os.register_at_fork(after_in_child=self.forget_loader)
+                self.loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix='dictionary-prefetch')
+            return Prefetch(self.generation, self.loader.submit(self.get, path, min_length, max_length))
+
+    def wait(self, prefetch, path, min_length, max_length):
+        """
+        :param prefetch: What prefetch(path, min_length, max_length) returned
+        :return: The DictionaryEntry, raising whatever get raised, e.g. FileNotFoundError for a missing word list
+        """
+        if prefetch.generation != self.generation:
+            return self.get(path, min_length, max_length)
+        return prefetch.future.result()
+
+    def evict(self):
+        with self.lock:
+            while len(self.entries) > 1 and self.size() > self.max_bytes:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def size(self):
+        return sum(entry.size for entry in self.entries.values())
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        """
+        :return: The cache's counters, suitable for exporting to a metrics system
+        """
+        with self.lock:
+            return {'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions,
+                    'entries': len(self.entries), 'bytes': self.size(), 'max_bytes': self.max_bytes}
+
+
+dictionary_cache = DictionaryCache()
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        sys.exit(f'Usage: python {sys.argv[0]} <word list> <compiled dictionary>')
+    print(f'Compiled {compile_dictionary(sys.argv[1], sys.argv[2])} words into {sys.argv[2]}')
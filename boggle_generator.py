@@ -0,0 +1,224 @@
+import os
+import random
+import time
+from array import array
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import lru_cache
+from itertools import count as counter
+from boggle import ENGLISH, Board, Boggle, CompactBoard, Cube
+
+ROLL_POOL = list(range(6))
+
+
+def bulk_choices(rng, pool, k):
+    """
+    Makes k independent, uniform picks from pool in one go.  When pool has at most 256 entries, all below 256, the
+    picks come from rng.randbytes: bytes that would bias the result are deleted and the rest are mapped onto pool by
+    bytes.translate, so no Python code runs per pick.
+    :param rng: A random.Random
+    :param pool: A list of small non-negative ints; repeat an entry to give it more weight
+    :return: An array('B') (or array('H') for large pools) of the picks
+    """
+    if len(pool) > 256 or max(pool) > 255:
+        return array('H', rng.choices(pool, k=k))
+    limit = 256 - 256 % len(pool)
+    table = bytes(pool[byte % len(pool)] if byte < limit else 0 for byte in range(256))
+    biased = bytes(range(limit, 256))
+    drawn = bytearray()
+    while len(drawn) < k:
+        needed = k - len(drawn)
+        drawn += rng.randbytes(needed + needed * (256 - limit) // limit + 16).translate(table, biased)
+    return array('B', drawn[:k])
+
+
+@lru_cache(maxsize=None)
+def letter_pool(distribution):
+    """
+    :return: For a LetterDistribution whose weights are all whole numbers, a bulk_choices pool of token indices with
+    each index repeated as often as its weight; otherwise None
+    """
+    weights = list(distribution.weights.values())
+    if not all(float(weight).is_integer() for weight in weights):
+        return None
+    return [token for token, weight in enumerate(weights) for _ in range(int(weight))]
+
+
+def draw_tokens(rng, distribution, k):
+    """
+    :return: An array of k token indices drawn from distribution, by bulk_choices where its weights allow, otherwise
+    from its alias table
+    """
+    pool = letter_pool(distribution)
+    if pool is None:
+        return array('H', distribution.sample_ids(k, rng))
+    return bulk_choices(rng, pool, k)
+
+
+class BoardBatch:
+    """
+    The faces and rolls of count boards, drawn up front in bulk (see bulk_choices) from a seeded random number
+    generator.
+
+    Boards are only built when asked for, by indexing or iterating over the batch, and the same seed always produces
+    the same boards.  Face tokens are stored as indices into the distribution's tokens, the same encoding CompactBoard
+    uses.
+    """
+
+    def __init__(self, count, grid_size, seed=None, distribution=None):
+        """
+        :param distribution: The LetterDistribution faces are drawn from; ENGLISH if not given
+        """
+        self.count = count
+        self.grid_size = grid_size
+        self.cells = grid_size[0] * grid_size[1]
+        self.seed = seed
+        self.distribution = distribution or ENGLISH
+        self.tokens = self.distribution.tokens
+        rng = random.Random(seed)
+        self.letters = draw_tokens(rng, self.distribution, 6 * self.cells * count)
+        self.rolls = bulk_choices(rng, ROLL_POOL, self.cells * count)
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, n):
+        return self.board(n)
+
+    def __iter__(self):
+        return (self.board(n) for n in range(self.count))
+
+    def cube_letters(self, n):
+        return array('H', self.letters[6 * self.cells * n:6 * self.cells * (n + 1)])
+
+    def cube_tops(self, n):
+        letters = self.letters
+        base = 6 * self.cells * n
+        rolls = self.rolls[self.cells * n:self.cells * (n + 1)]
+        return array('H', [letters[base + 6 * cube + roll] for cube, roll in enumerate(rolls)])
+
+    def faces(self, n):
+        """
+        :return: The top_letter of every Space of board n, in index order, without building the board
+        """
+        tokens = self.tokens
+        return [tokens[x] for x in self.cube_tops(n)]
+
+    def board(self, n, compact=True):
+        """
+        :param n: The position of the board in the batch
+        :param compact: Whether to return a CompactBoard (the default) or a Board
+        """
+        if not 0 <= n < self.count:
+            raise IndexError(f'Board {n} is outside a batch of {self.count}')
+        if compact:
+            return CompactBoard(self.grid_size, letters=self.cube_letters(n), tops=self.cube_tops(n),
+                                distribution=self.distribution)
+        letters, tokens = self.cube_letters(n), self.tokens
+        board = Board(self.grid_size, cubes=[Cube(letters=[tokens[x] for x in letters[6 * cube:6 * cube + 6]])
+                                              for cube in range(self.cells)], distribution=self.distribution)
+        for cube, top in zip(board.cubes, self.cube_tops(n)):
+            cube.top_letter = tokens[top]
+        return board
+
+
+GeneratedBoard = namedtuple('GeneratedBoard', ['board', 'words', 'score'])
+
+worker_game = None
+
+
+def start_worker(grid_size, dictionary, scoring_model, distribution=None):
+    """
+    Runs once in each worker process, so the dictionary and its Trie are loaded once per worker rather than per task.
+    """
+    global worker_game
+    worker_game = Boggle(grid_size, 1, dictionary=dictionary, scoring_model=scoring_model, compact_board=True,
+                         distribution=distribution)
+    worker_game.build_word_trie()
+
+
+def solve_batch(seed, batch_size, min_words, min_score):
+    """
+    Solves every board of a BoardBatch in a worker process.
+    :return: (worker pid, boards checked, seconds taken, [(letters, tops, words, score) for each accepted board])
+    """
+    start = time.perf_counter()
+    batch = BoardBatch(batch_size, worker_game.board.grid_size, seed=seed, distribution=worker_game.distribution)
+    accepted = []
+    for n in range(batch_size):
+        worker_game.board = batch[n]
+        words = worker_game.find_all_words()
+        score = worker_game.scorer.total(words)
+        if len(words) >= min_words and score >= min_score:
+            accepted.append((worker_game.board.letters, worker_game.board.tops, sorted(words), score))
+    return os.getpid(), batch_size, time.perf_counter() - start, accepted
+
+
+class BoardGenerator:
+    """
+    Generates boards with at least min_words words and a total score of at least min_score, by solving random
+    candidates across a pool of worker processes.
+    """
+
+    def __init__(self, grid_size, min_words=0, min_score=0, dictionary='boggle_words.txt', scoring_model=None,
+                 workers=None, batch_size=64, seed=None, distribution=None):
+        """
+        :param workers: The number of worker processes; defaults to the number of CPUs
+        :param batch_size: The number of candidate boards each task solves
+        :param seed: Makes the candidate boards reproducible, although accepted boards may arrive in any order
+        :param distribution: The LetterDistribution candidate boards are drawn from; ENGLISH if not given
+        """
+        self.grid_size = grid_size
+        self.min_words = min_words
+        self.min_score = min_score
+        self.dictionary = dictionary
+        self.scoring_model = scoring_model
+        self.workers = workers or os.cpu_count()
+        self.batch_size = batch_size
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        self.distribution = distribution or ENGLISH
+        self.worker_stats = {}
+
+    def generate(self, count):
+        """
+        :return: A generator of count GeneratedBoard tuples, yielded as soon as they are found
+        """
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=start_worker,
+                                 initargs=(self.grid_size, self.dictionary, self.scoring_model,
+                                           self.distribution)) as pool:
+            tasks = counter()
+            pending = {self.submit(pool, next(tasks)) for _ in range(2 * self.workers)}
+            produced = 0
+            try:
+                while produced < count:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        pid, checked, elapsed, accepted = future.result()
+                        stats = self.worker_stats.setdefault(pid, [0, 0.0])
+                        stats[0] += checked
+                        stats[1] += elapsed
+                        for letters, tops, words, score in accepted[:count - produced]:
+                            produced += 1
+                            board = CompactBoard(self.grid_size, letters=letters, tops=tops,
+                                                 distribution=self.distribution)
+                            yield GeneratedBoard(board, words, score)
+                        pending.add(self.submit(pool, next(tasks)))
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def submit(self, pool, task):
+        return pool.submit(solve_batch, self.seed + task, self.batch_size, self.min_words, self.min_score)
+
+    def throughput(self):
+        """
+        :return: A dict mapping each worker's pid to the candidate boards it solved per second
+        """
+        return {pid: checked / elapsed for pid, (checked, elapsed) in self.worker_stats.items() if elapsed}
+
+
+def generate_boards(count, grid_size, min_words=0, min_score=0, **options):
+    """
+    Streams count boards meeting the given quality bar; see BoardGenerator for the other options.
+    """
+    return BoardGenerator(grid_size, min_words=min_words, min_score=min_score, **options).generate(count)
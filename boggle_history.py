@@ -0,0 +1,104 @@
+import json
+from collections import Counter
+
+"""
+An append-only log of finished rounds, so a long session keeps only running totals in memory.  Pass a GameHistory to
+Boggle and, as each round is scored, one JSON line is appended for it and the round's words are dropped from every
+Player:
+    {"event": "round", "round": 0, "grid": [4, 4], "board": ["A", ...],
+     "players": [{"name": "Billy", "words": {"BEAD": 1}, "score": 1, "total": 1}, ...]}
+When the game ends a {"event": "game", "rounds": 3, "scores": {"Billy": 12, ...}} line follows.  HistoryReader reads
+the log back one line at a time, to replay it or aggregate over it.
+"""
+
+
+class GameHistory:
+
+    def __init__(self, path):
+        self.path = path
+        self.handle = open(path, 'a')
+        self.totals = Counter()
+        self.rounds = 0
+        self.games = 0
+
+    def record_round(self, game):
+        """
+        Appends game's current round, which should already be scored, and removes it from each Player's words.
+        """
+        players = []
+        for player in game.players:
+            words = player.words.pop(game.current_round, {})
+            score = sum(words.values())
+            self.totals[player.name] += score
+            players.append({'name': player.name, 'words': words, 'score': score, 'total': player.score})
+        self.write({'event': 'round', 'round': game.current_round, 'grid': [game.x_width, game.y_width],
+                    'board': game.board.faces(), 'players': players})
+        self.rounds += 1
+
+    def record_game(self, game):
+        self.write({'event': 'game', 'rounds': game.current_round,
+                    'scores': {player.name: player.score for player in game.players}})
+        self.games += 1
+
+    def write(self, record):
+        self.handle.write(json.dumps(record) + '\n')
+        self.handle.flush()
+
+    def close(self):
+        self.handle.close()
+
+
+class HistoryReader:
+    """
+    Reads a GameHistory log lazily: only the record being looked at is ever in memory.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def __iter__(self):
+        with open(self.path, 'r') as handle:
+            for line in handle:
+                if line.strip():
+                    yield json.loads(line)
+
+    def rounds(self):
+        return (record for record in self if record['event'] == 'round')
+
+    def replay(self):
+        """
+        :return: A generator of (round record, dict mapping each player's name to their score after that round); the
+        totals start again after every game
+        """
+        totals = {}
+        for record in self:
+            if record['event'] == 'game':
+                totals = {}
+                continue
+            for player in record['players']:
+                totals[player['name']] = totals.get(player['name'], 0) + player['score']
+            yield record, dict(totals)
+
+    def aggregate(self):
+        """
+        :return: A dict of totals over the whole log: games, rounds, scores and words_found per player name,
+        words_shared (words that scored 0 because more than one player found them) and word_counts, how often each
+        word was found
+        """
+        games, rounds = 0, 0
+        scores, words_found, word_counts = Counter(), Counter(), Counter()
+        words_shared = 0
+        for record in self:
+            if record['event'] == 'game':
+                games += 1
+                continue
+            rounds += 1
+            finders = Counter()
+            for player in record['players']:
+                scores[player['name']] += player['score']
+                words_found[player['name']] += len(player['words'])
+                finders.update(player['words'])
+            word_counts.update(finders)
+            words_shared += sum(count for count in finders.values() if count > 1)
+        return {'games': games, 'rounds': rounds, 'scores': scores, 'words_found': words_found,
+                'words_shared': words_shared, 'word_counts': word_counts}
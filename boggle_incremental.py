@@ -0,0 +1,87 @@
+from collections import namedtuple
+
+Keystroke = namedtuple('Keystroke', ['traceable', 'is_word', 'score'])
+
+
+class IncrementalValidator:
+    """
+    Validates a word one character at a time, as a player types it.
+
+    Between keystrokes it keeps every live path across the Board, as (Space index, bitmask of used Spaces, characters
+    of that Space's face matched so far) tuples, together with the dictionary Trie node for the text typed so far.
+    Each keystroke only extends those paths, so no keystroke after the first searches the whole Board.
+
+    The Board's faces are read when the validator is created or reset, so call reset after the Board is shaken.
+    """
+
+    def __init__(self, game):
+        self.game = game
+        self.trie = game.build_word_trie()
+        self.adjacency = game.board.adjacency
+        self.faces = []
+        self.text = ''
+        self.paths = set()
+        self.node = None
+        self.history = []
+        self.reset()
+
+    def reset(self):
+        self.faces = [face.upper() for face in self.game.board.faces()]
+        self.text = ''
+        self.paths = set()
+        self.node = self.trie.root
+        self.history = []
+
+    def feed(self, char):
+        """
+        :param char: The next character the player typed
+        :return: A Keystroke saying whether the text typed so far can be traced on the Board, whether it is a valid
+        word that can be traced, and its score (0 unless it is a word)
+        """
+        char = char.upper()
+        self.history.append((self.text, self.paths, self.node))
+        self.paths = self.extend_paths(char)
+        self.text += char
+        if self.node is not None:
+            self.node = self.trie.step(self.node, char.lower())
+        return self.status()
+
+    def type(self, text):
+        """
+        Feeds every character of text in turn.
+        :return: The Keystroke for the last character
+        """
+        result = self.status()
+        for char in text:
+            result = self.feed(char)
+        return result
+
+    def backspace(self):
+        if self.history:
+            self.text, self.paths, self.node = self.history.pop()
+        return self.status()
+
+    def extend_paths(self, char):
+        faces = self.faces
+        extended = set()
+        if not self.text:
+            for index, face in enumerate(faces):
+                if face[:1] == char:
+                    extended.add((index, 1 << index, 1))
+            return extended
+        for index, used, matched in self.paths:
+            face = faces[index]
+            if matched < len(face):
+                if face[matched] == char:
+                    extended.add((index, used, matched + 1))
+                continue
+            for neighbor in self.adjacency[index]:
+                if not used >> neighbor & 1 and faces[neighbor][:1] == char:
+                    extended.add((neighbor, used | 1 << neighbor, 1))
+        return extended
+
+    def status(self):
+        complete = any(matched == len(self.faces[index]) for index, _, matched in self.paths)
+        is_word = complete and self.node is not None and self.trie.is_word(self.node) and \
+            self.game.check_if_valid_english(word=self.text.lower())
+        return Keystroke(bool(self.paths), is_word, self.game.score_word(self.text) if is_word else 0)
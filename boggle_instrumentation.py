@@ -0,0 +1,146 @@
+import json
+import time
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+
+"""
+Optional timing and search counters for Boggle.  Pass an Instrumentation to Boggle to collect, for every round and for
+the game as a whole:
+    phases    Seconds spent in dictionary_load, interface (displaying and waiting for input), validation, scoring
+              and shuffle (shuffle_cubes, reassign_cubes and shake_cubes)
+    counters  search_nodes (Trie steps taken while tracing words), search_pruned (steps that ended a path because no
+              word continues that way) and words_submitted
+    prune_rate  search_pruned / search_nodes
+Each record is a dict sent to a sink: MemorySink, JsonLinesSink or CallbackSink.  Without one, Boggle uses
+NULL_INSTRUMENTATION, which does nothing and leaves the search code untouched.
+"""
+
+
+class MemorySink:
+
+    def __init__(self):
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class JsonLinesSink:
+    """
+    Appends each record to a file as one line of JSON.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def emit(self, record):
+        with open(self.path, 'a') as handle:
+            handle.write(json.dumps(record) + '\n')
+
+
+class CallbackSink:
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def emit(self, record):
+        self.callback(record)
+
+
+class Instrumentation:
+
+    enabled = True
+
+    def __init__(self, sink=None):
+        self.sink = sink or MemorySink()
+        self.round_phases = Counter()
+        self.round_counters = Counter()
+        self.game_phases = Counter()
+        self.game_counters = Counter()
+        self.rounds = 0
+
+    @contextmanager
+    def phase(self, name, per_game=False):
+        """
+        Times the body of a with block under name.
+        :param per_game: Record the time against the game as a whole rather than the current round
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            (self.game_phases if per_game else self.round_phases)[name] += time.perf_counter() - start
+
+    def count(self, name, amount=1):
+        self.round_counters[name] += amount
+
+    def end_round(self, round_number):
+        self.sink.emit(self.record('round', round=round_number, phases=self.round_phases, counters=self.round_counters))
+        self.game_phases.update(self.round_phases)
+        self.game_counters.update(self.round_counters)
+        self.round_phases = Counter()
+        self.round_counters = Counter()
+        self.rounds += 1
+
+    def end_game(self):
+        """
+        Emits the game's totals, including anything recorded since the last round, and resets the Instrumentation so
+        it can be used for another game.
+        """
+        self.game_phases.update(self.round_phases)
+        self.game_counters.update(self.round_counters)
+        self.sink.emit(self.record('game', rounds=self.rounds, phases=self.game_phases, counters=self.game_counters))
+        self.__init__(self.sink)
+
+    @staticmethod
+    def record(event, phases, counters, **fields):
+        record = {'event': event, **fields, 'phases': dict(phases), 'counters': dict(counters)}
+        record['prune_rate'] = counters['search_pruned'] / counters['search_nodes'] if counters['search_nodes'] else 0.0
+        return record
+
+
+class NullInstrumentation:
+    """
+    The Instrumentation used when none is given: every method is a no-op.
+    """
+
+    enabled = False
+    null_phase = nullcontext()
+
+    def phase(self, name, per_game=False):
+        return self.null_phase
+
+    def count(self, name, amount=1):
+        return None
+
+    def end_round(self, round_number):
+        return None
+
+    def end_game(self):
+        return None
+
+
+NULL_INSTRUMENTATION = NullInstrumentation()
+
+
+class CountingTrie:
+    """
+    Wraps a Trie (or CompiledDictionary) to count search_nodes and search_pruned.  Boggle only uses it while
+    Instrumentation is enabled, so uninstrumented searches pay nothing for it.
+    """
+
+    def __init__(self, trie, instrumentation):
+        self.trie = trie
+        self.root = trie.root
+        self.longest = trie.longest
+        self.instrumentation = instrumentation
+
+    def step(self, node, token):
+        node = self.trie.step(node, token)
+        self.instrumentation.count('search_nodes')
+        if node is None:
+            self.instrumentation.count('search_pruned')
+        return node
+
+    def is_word(self, node):
+        return self.trie.is_word(node)
@@ -6,7 +6,7 @@ class BoggleInterface:
     def display_board(self):
         return None
 
-    def dissplay_scores(self):
+    def display_scores(self):
         return None
 
     def get_words(self, player):
@@ -15,4 +15,8 @@ class BoggleInterface:
     def get_player_names(self):
         return []
 
+    def print_all_words(self, words):
+        return None
 
+    def display_final_scores(self):
+        return None
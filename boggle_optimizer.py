@@ -0,0 +1,262 @@
+import argparse
+import math
+import random
+from collections import Counter, namedtuple
+from functools import lru_cache
+from boggle import Boggle
+from boggle_dictionary import Trie
+
+"""
+Local search for high-scoring Boards.  An IncrementalSolver keeps a Board's words and total score up to date as single
+Cubes change face or swap Spaces, so each step of a search costs a fraction of a full solve, and a BoardOptimizer
+hill-climbs or anneals over such steps:
+    python boggle_optimizer.py --grid 4 4 --steps 20000 --anneal
+"""
+
+OptimizedBoard = namedtuple('OptimizedBoard', ['score', 'faces', 'steps', 'accepted'])
+
+
+@lru_cache(maxsize=None)
+def build_distances(x_width, y_width):
+    """
+    :return: For each pair of Space indices on a Board of this shape, the fewest steps between them
+    """
+    return tuple(tuple(max(abs(index % x_width - other % x_width), abs(index // x_width - other // x_width))
+                       for other in range(x_width * y_width)) for index in range(x_width * y_width))
+
+
+class IncrementalSolver:
+    """
+    A Board's solution, kept up to date as its Spaces change.
+
+    Every path across the Board whose letters are the prefix of some word is kept, filed under the Space it ends on, as
+    (a bitmask of the Spaces it passes through, its Trie node, its letters).  When Spaces change, only the paths through
+    them are dropped and searched again: each new path either starts on a changed Space or steps onto one from a kept
+    path, so no part of the Board the change did not touch is walked twice.
+    """
+
+    def __init__(self, game):
+        self.game = game
+        self.trie = game.build_word_trie()
+        self.faces = []
+        self.prefixes = []
+        self.path_counts = Counter()
+        self.score = 0
+        self.boggle_words = game.boggle_words
+        self.reset()
+
+    def reset(self):
+        """
+        Solves the whole Board again, e.g. after it has been changed other than through set_face and swap.
+        """
+        self.faces = [face.lower() for face in self.game.board.faces()]
+        self.prefixes = [[] for _ in self.faces]
+        self.path_counts = Counter()
+        self.score = 0
+        self.search(range(len(self.faces)))
+
+    @property
+    def words(self):
+        """
+        :return: The same set of words as game.find_all_words()
+        """
+        return set(self.path_counts)
+
+    def space(self, index):
+        board = self.game.board
+        return board.spaces[index // board.x_width][index % board.x_width]
+
+    def set_face(self, index, face):
+        """
+        Turns the Cube on the Space numbered index to face.
+        """
+        self.space(index).cube.top_letter = face
+        self.update([index])
+
+    def swap(self, first, second):
+        """
+        Swaps the Cubes on the Spaces numbered first and second.
+        """
+        first_space, second_space = self.space(first), self.space(second)
+        first_space.cube, second_space.cube = second_space.cube, first_space.cube
+        self.update([first, second])
+
+    def update(self, changed):
+        """
+        Brings the solution up to date after the Spaces numbered changed have changed face.  Only Spaces close enough to
+        a changed one for a word to span both can hold paths through it.
+        """
+        changed = set(changed)
+        changed_mask = sum(1 << index for index in changed)
+        reach = self.trie.longest - 1
+        distances = build_distances(self.game.board.x_width, self.game.board.y_width)
+        is_word = self.trie.is_word
+        for index, paths in enumerate(self.prefixes):
+            if all(distances[index][other] > reach for other in changed):
+                continue
+            kept = [entry for entry in paths if not entry[0] & changed_mask]
+            if len(kept) < len(paths):
+                for mask, node, letters in paths:
+                    if mask & changed_mask and is_word(node):
+                        self.drop(letters)
+                self.prefixes[index] = kept
+        for index in changed:
+            self.faces[index] = self.space(index).cube.top_letter.lower()
+        self.search(changed)
+
+    def record(self, word):
+        if word not in self.boggle_words:
+            return
+        self.path_counts[word] += 1
+        if self.path_counts[word] == 1:
+            self.score += self.game.scorer(word)
+
+    def drop(self, word):
+        if word not in self.boggle_words:
+            return
+        self.path_counts[word] -= 1
+        if not self.path_counts[word]:
+            del self.path_counts[word]
+            self.score -= self.game.scorer(word)
+
+    def search(self, changed):
+        """
+        Files every path that passes through at least one of the Spaces numbered changed, none of whose paths may be
+        filed yet.  The paths are split at the first changed Space they reach: the part before it is a path already
+        filed, so only the steps from there on are searched, over an explicit stack.
+        """
+        faces, adjacency, trie, prefixes = self.faces, self.game.board.adjacency, self.trie, self.prefixes
+        step, is_word = trie.step, trie.is_word
+        if isinstance(trie, Trie) and all(len(face) == 1 or face in trie.tokens for face in faces):
+            step = dict.get
+        pending = []
+        for index in changed:
+            face = faces[index]
+            node = step(trie.root, face)
+            if node is not None:
+                pending.append((index, 1 << index, node, face))
+            for neighbor in adjacency[index]:
+                for mask, node, letters in prefixes[neighbor]:
+                    node = step(node, face)
+                    if node is not None:
+                        pending.append((index, mask | 1 << index, node, letters + face))
+        while pending:
+            entry = pending.pop()
+            index, mask, node, letters = entry
+            prefixes[index].append(entry[1:])
+            if is_word(node):
+                self.record(letters)
+            for neighbor in adjacency[index]:
+                if not mask >> neighbor & 1:
+                    child = step(node, faces[neighbor])
+                    if child is not None:
+                        pending.append((neighbor, mask | 1 << neighbor, child, letters + faces[neighbor]))
+
+
+class BoardOptimizer:
+    """
+    Searches for a high-scoring Board by changing game's Board one step at a time: either turning one Cube to another
+    face, or swapping the Cubes on two Spaces.
+    """
+
+    def __init__(self, game, free_faces=False, seed=None):
+        """
+        :param free_faces: Let a Cube show any face of game's LetterDistribution, rather than only its own six letters
+        (which keeps every Board one that the Cubes could really roll)
+        """
+        self.game = game
+        self.free_faces = free_faces
+        self.rng = random.Random(seed)
+        self.solver = IncrementalSolver(game)
+        self.spaces = game.x_width * game.y_width
+
+    def mutate(self):
+        """
+        Makes one random change to the Board.
+        :return: A move that undo reverses
+        """
+        if self.spaces > 1 and self.rng.random() < 0.5:
+            first, second = self.rng.sample(range(self.spaces), 2)
+            self.solver.swap(first, second)
+            return 'swap', first, second
+        index = self.rng.randrange(self.spaces)
+        cube = self.solver.space(index).cube
+        previous = cube.top_letter
+        options = self.game.distribution.tokens if self.free_faces else cube.letters
+        self.solver.set_face(index, self.rng.choice(options))
+        return 'face', index, previous
+
+    def undo(self, move):
+        kind, index, other = move
+        if kind == 'swap':
+            self.solver.swap(index, other)
+        else:
+            self.solver.set_face(index, other)
+
+    def snapshot(self):
+        spaces = [space for row in self.game.board.spaces for space in row]
+        cubes = [space.cube for space in spaces]
+        return cubes, [cube.top_letter for cube in cubes]
+
+    def restore(self, snapshot):
+        cubes, tops = snapshot
+        for space, cube, top_letter in zip([space for row in self.game.board.spaces for space in row], cubes, tops):
+            space.cube = cube
+            cube.top_letter = top_letter
+        self.solver.reset()
+
+    def hill_climb(self, steps):
+        """
+        Keeps every change that does not lower the score.
+        :return: An OptimizedBoard describing the Board it finishes on
+        """
+        accepted = 0
+        for _ in range(steps):
+            before = self.solver.score
+            move = self.mutate()
+            if self.solver.score >= before:
+                accepted += 1
+            else:
+                self.undo(move)
+        return OptimizedBoard(self.solver.score, self.game.board.faces(), steps, accepted)
+
+    def anneal(self, steps, start_temperature=5.0, end_temperature=0.05):
+        """
+        Simulated annealing: keeps every change that does not lower the score, and one that lowers it by delta with
+        probability exp(-delta / temperature), as the temperature cools geometrically from start_temperature to
+        end_temperature.  The Board is left as the best one seen.
+        :return: An OptimizedBoard describing that Board
+        """
+        best, best_state = self.solver.score, self.snapshot()
+        accepted = 0
+        for step in range(steps):
+            temperature = start_temperature * (end_temperature / start_temperature) ** (step / max(1, steps - 1))
+            before = self.solver.score
+            move = self.mutate()
+            delta = self.solver.score - before
+            if delta >= 0 or self.rng.random() < math.exp(delta / temperature):
+                accepted += 1
+                if self.solver.score > best:
+                    best, best_state = self.solver.score, self.snapshot()
+            else:
+                self.undo(move)
+        if self.solver.score < best:
+            self.restore(best_state)
+        return OptimizedBoard(self.solver.score, self.game.board.faces(), steps, accepted)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Search for a high-scoring Boggle board')
+    parser.add_argument('--grid', type=int, nargs=2, default=(4, 4), metavar=('X_WIDTH', 'Y_WIDTH'))
+    parser.add_argument('--steps', type=int, default=10000)
+    parser.add_argument('--anneal', action='store_true', help='use simulated annealing rather than hill-climbing')
+    parser.add_argument('--free-faces', action='store_true', help='let a Cube show any face, not just its own')
+    parser.add_argument('--dictionary', default='boggle_words.txt')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+    optimizer = BoardOptimizer(Boggle(tuple(args.grid), 1, dictionary=args.dictionary), free_faces=args.free_faces,
+                               seed=args.seed)
+    result = optimizer.anneal(args.steps) if args.anneal else optimizer.hill_climb(args.steps)
+    for y in range(args.grid[1]):
+        print(' '.join(f'{face:<2}' for face in result.faces[y * args.grid[0]:(y + 1) * args.grid[0]]))
+    print(f'score {result.score}, {len(optimizer.solver.words)} words, {result.accepted} of {result.steps} steps kept')
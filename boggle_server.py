@@ -0,0 +1,328 @@
+import argparse
+import asyncio
+import logging
+import random
+import time
+from boggle import Boggle, Player
+from boggle_instrumentation import Instrumentation
+
+"""
+An asyncio server that runs many Boggle games at once over a line-based TCP protocol.  Every player in a game plays the
+same Board at the same time, under a round timer, and each word is checked as soon as it arrives.
+
+Client -> server:
+    The first line is the player's name.  Every later line is one or more words, separated by spaces.
+Server -> client:
+    WELCOME <name>                  The player has joined a game, which starts once it is full
+    BOARD <x_width> <y_width> <faces, row by row, separated by spaces>
+    SCORE <score> <name>            One line per player, before each round
+    ROUND <round> <seconds>         Submissions are open for the next <seconds> seconds
+    ACCEPTED <word> <score> | REJECTED <word> | CLOSED <word>
+    ROUND_OVER <round>
+    FINAL <score> <name>            One line per player, after the last round
+    GAME_OVER                       The server closes the connection after this line
+"""
+
+logger = logging.getLogger(__name__)
+
+
+class NetworkInterface:
+    """
+    Implements the methods of boggle_interface_contract.BoggleInterface for a GameRoom, by broadcasting protocol lines
+    to every connected player instead of printing.  The Board and scores are only sent while a round is open, so
+    Boggle.run_turn asking for them again as the round is scored sends nothing.
+    """
+
+    def __init__(self, game_instance, room):
+        self.game_instance = game_instance
+        self.room = room
+
+    def display_board(self):
+        if not self.room.round_open:
+            return
+        board = self.game_instance.board
+        self.room.broadcast(f'BOARD {board.x_width} {board.y_width} {" ".join(board.faces())}')
+
+    def display_scores(self):
+        if not self.room.round_open:
+            return
+        for player in self.game_instance.players:
+            self.room.broadcast(f'SCORE {player.score} {player.name}')
+
+    def get_words(self, player):
+        return list(player.words[self.game_instance.current_round])
+
+    def get_player_names(self):
+        return [player.name for player in self.room.connections]
+
+    def print_all_words(self, words):
+        self.room.broadcast(f'ALL_WORDS {" ".join(sorted(words))}')
+
+    def display_final_scores(self):
+        for player in self.game_instance.players:
+            self.room.broadcast(f'FINAL {player.score} {player.name}')
+
+
+class GameRoom:
+    """
+    One game: its Boggle instance, the connections of its players, and the task that runs its rounds.
+    """
+
+    def __init__(self, server):
+        self.server = server
+        instrumentation = Instrumentation(server.instrumentation_sink) if server.instrumentation_sink else None
+        self.game = Boggle(server.grid_size, server.max_rounds, scoring_model=server.scoring_model,
+                           max_players=server.players_per_game, dictionary=server.dictionary,
+                           instrumentation=instrumentation, history=server.history)
+        self.game.interface = NetworkInterface(self.game, self)
+        self.connections = {}
+        self.round_open = False
+        self.finished = False
+        self.task = None
+
+    def is_full(self):
+        return len(self.connections) >= self.game.max_players
+
+    def join(self, name, writer):
+        player = Player(name=name)
+        player.build_score_dict(max_rounds=self.game.max_rounds)
+        self.connections[player] = writer
+        self.game.players.append(player)
+        writer.write(f'WELCOME {name}\n'.encode())
+        if self.is_full():
+            self.task = asyncio.ensure_future(self.play())
+            self.task.add_done_callback(self.log_failure)
+        return player
+
+    @staticmethod
+    def log_failure(task):
+        """
+        Logs the exception that ended a game's task, which would otherwise only surface when the task is collected.
+        """
+        if not task.cancelled() and task.exception() is not None:
+            logger.error('Game ended with an error', exc_info=task.exception())
+
+    def leave(self, player):
+        """
+        Called when player's connection drops.  Until the game starts, player gives up their seat; once it has started,
+        they keep their place on the scoreboard but are sent nothing more.
+        """
+        if player not in self.connections:
+            return
+        if self.task is None:
+            del self.connections[player]
+            self.game.players.remove(player)
+        else:
+            self.connections[player].close()
+
+    def broadcast(self, line):
+        data = f'{line}\n'.encode()
+        for writer in self.connections.values():
+            if not writer.is_closing():
+                writer.write(data)
+
+    def submit(self, player, words):
+        """
+        Checks a line of words from player the moment it arrives.
+        :return: The protocol lines to send back to player
+        """
+        if self.finished or not self.round_open:
+            return [f'CLOSED {word}' for word in words]
+        accepted = self.game.validate_words(words)
+        player.words[self.game.current_round].update(accepted)
+        return [f'ACCEPTED {word} {accepted[word]}' if word in accepted else f'REJECTED {word}' for word in words]
+
+    async def play(self):
+        """
+        Runs the game's rounds on Boggle's own round loop, so server games are scored, recorded in the game's history
+        and instrumented exactly as local ones are.  Words are validated as they arrive by submit; once the round
+        closes, run_round takes each player's accepted words through run_turn and scores them.
+        """
+        game = self.game
+        while game.current_round < game.max_rounds:
+            self.round_open = True
+            game.interface.display_board()
+            game.interface.display_scores()
+            self.broadcast(f'ROUND {game.current_round} {self.server.round_seconds}')
+            await asyncio.sleep(self.server.round_seconds)
+            self.round_open = False
+            game.run_round()
+            self.broadcast(f'ROUND_OVER {game.current_round}')
+            game.next_round()
+        self.finished = True
+        game.end_game()
+        self.broadcast('GAME_OVER')
+        for writer in self.connections.values():
+            writer.close()
+        self.server.games_completed += 1
+
+
+class BoggleServer:
+    """
+    Accepts players over TCP and seats them, in arrival order, in games of players_per_game.  All games share one
+    event loop and, through the dictionary cache, one copy of the dictionary.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8765, grid_size=(4, 4), max_rounds=3, players_per_game=2,
+                 round_seconds=60, dictionary=None, scoring_model=None, history=None, instrumentation_sink=None):
+        """
+        :param history: A boggle_history.GameHistory that every game's rounds are appended to
+        :param instrumentation_sink: A sink (see boggle_instrumentation) that each game's Instrumentation emits to
+        """
+        self.host = host
+        self.port = port
+        self.grid_size = grid_size
+        self.max_rounds = max_rounds
+        self.players_per_game = players_per_game
+        self.round_seconds = round_seconds
+        self.dictionary = dictionary
+        self.scoring_model = scoring_model
+        self.history = history
+        self.instrumentation_sink = instrumentation_sink
+        self.waiting_room = None
+        self.games_completed = 0
+        self.server = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle_player, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        if self.server is None:
+            await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    def close(self):
+        self.server.close()
+
+    def seat(self, name, writer):
+        if self.waiting_room is None or self.waiting_room.is_full():
+            self.waiting_room = GameRoom(self)
+        room = self.waiting_room
+        return room, room.join(name, writer)
+
+    async def handle_player(self, reader, writer):
+        try:
+            name = (await reader.readline()).decode().strip()
+        except ConnectionError:
+            name = ''
+        if not name:
+            writer.close()
+            return
+        room, player = self.seat(name, writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                words = [word.upper() for word in line.decode().split()]
+                if words and not writer.is_closing():
+                    writer.write(''.join(f'{reply}\n' for reply in room.submit(player, words)).encode())
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            if not room.finished:
+                room.leave(player)
+
+
+async def simulated_player(host, port, name, words_per_round, latencies):
+    """
+    Plays one seat of a game: each round it reads the Board and submits words_per_round random paths across it, one
+    word per line, recording how long each reply took.
+    :return: The player's final score, or None if the game did not finish
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(f'{name}\n'.encode())
+    faces, x_width = [], 1
+    final_score = None
+    while True:
+        line = (await reader.readline()).decode().split()
+        if not line or line[0] == 'GAME_OVER':
+            break
+        elif line[0] == 'BOARD':
+            x_width, faces = int(line[1]), line[3:]
+        elif line[0] == 'ROUND':
+            for _ in range(words_per_round):
+                start = time.perf_counter()
+                writer.write(f'{random_path(faces, x_width)}\n'.encode())
+                reply = (await reader.readline()).decode()
+                if not reply.startswith(('ACCEPTED', 'REJECTED', 'CLOSED')):
+                    break
+                latencies.append(time.perf_counter() - start)
+        elif line[0] == 'FINAL' and ' '.join(line[2:]) == name:
+            final_score = int(line[1])
+    writer.close()
+    return final_score
+
+
+def random_path(faces, x_width, length=None):
+    """
+    :return: The letters along a random walk of adjacent, unused Spaces
+    """
+    y_width = len(faces) // x_width
+    index = random.randrange(len(faces))
+    path = [index]
+    for _ in range((length or random.randint(3, 6)) - 1):
+        x, y = index % x_width, index // x_width
+        options = [ny * x_width + nx for ny in (y - 1, y, y + 1) for nx in (x - 1, x, x + 1)
+                   if 0 <= nx < x_width and 0 <= ny < y_width and ny * x_width + nx not in path]
+        if not options:
+            break
+        index = random.choice(options)
+        path.append(index)
+    return ''.join(faces[x] for x in path).upper()
+
+
+async def run_load_test(host, port, players, words_per_round=20):
+    """
+    Connects players simulated players to a running BoggleServer and waits for all of their games to finish.
+    """
+    latencies = []
+    start = time.perf_counter()
+    scores = await asyncio.gather(*(simulated_player(host, port, f'bot-{n}', words_per_round, latencies)
+                                    for n in range(players)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    finished = sum(score is not None for score in scores)
+    print(f'{finished}/{players} players finished in {elapsed:.2f} s, {len(latencies)} words checked '
+          f'({len(latencies) / elapsed:.0f}/s)')
+    if latencies:
+        print(f'reply latency: median {latencies[len(latencies) // 2] * 1000:.2f} ms, '
+              f'p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f} ms')
+    return scores
+
+
+async def serve_and_load_test(args):
+    server = await BoggleServer(port=0, grid_size=(args.width, args.height), max_rounds=args.rounds,
+                                players_per_game=args.players_per_game, round_seconds=args.round_seconds,
+                                dictionary=args.dictionary).start()
+    await run_load_test(server.host, server.port, args.players, args.words_per_round)
+    print(f'{server.games_completed} games completed in one event loop')
+    server.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Run a multiplayer Boggle server, or load-test one')
+    parser.add_argument('mode', choices=['serve', 'load-test', 'self-test'],
+                        help='self-test starts a server and load-tests it in the same event loop')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--width', type=int, default=4)
+    parser.add_argument('--height', type=int, default=4)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--players-per-game', type=int, default=2)
+    parser.add_argument('--round-seconds', type=float, default=60)
+    parser.add_argument('--dictionary', default='boggle_words.txt')
+    parser.add_argument('--players', type=int, default=200, help='simulated players for the load test')
+    parser.add_argument('--words-per-round', type=int, default=20)
+    args = parser.parse_args()
+    if args.mode == 'serve':
+        asyncio.run(BoggleServer(args.host, args.port, (args.width, args.height), args.rounds, args.players_per_game,
+                                 args.round_seconds, args.dictionary).serve_forever())
+    elif args.mode == 'load-test':
+        asyncio.run(run_load_test(args.host, args.port, args.players, args.words_per_round))
+    else:
+        asyncio.run(serve_and_load_test(args))
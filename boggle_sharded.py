@@ -0,0 +1,135 @@
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor, wait
+from multiprocessing import shared_memory
+from boggle import build_adjacency_csr, search_paths
+from boggle_dictionary import dictionary_cache
+
+"""
+Solves one large Board on every core.  The Spaces are split by starting index into shards, each shard is searched by a
+worker process, and the words found by each shard are merged.  The Board is never pickled: its CSR adjacency table and
+the token id of every face live in one shared memory block, laid out as
+    offsets   uint32 * (Spaces + 1)
+    indices   uint32 * neighbor count
+    faces     uint16 * Spaces, an index into the tokens sent with each task
+which each worker attaches to once, when it starts.
+"""
+
+worker_board = None
+worker_trie = None
+
+
+class SharedBoard:
+    """
+    One Board shape's adjacency table and faces in a shared memory block, either created (when name is None) or
+    attached to by name.
+    """
+
+    def __init__(self, x_width, y_width, name=None):
+        offsets, indices = build_adjacency_csr(x_width, y_width)
+        self.spaces = x_width * y_width
+        self.neighbor_count = len(indices)
+        size = 4 * (len(offsets) + len(indices)) + 2 * self.spaces
+        if name is None:
+            self.memory = shared_memory.SharedMemory(create=True, size=size)
+            self.memory.buf[:4 * len(offsets)] = offsets.tobytes()
+            self.memory.buf[4 * len(offsets):4 * (len(offsets) + len(indices))] = indices.tobytes()
+        else:
+            self.memory = shared_memory.SharedMemory(name=name)
+        self.offsets = self.memory.buf[:4 * len(offsets)].cast('I')
+        self.indices = self.memory.buf[4 * len(offsets):4 * (len(offsets) + len(indices))].cast('I')
+        self.face_ids = self.memory.buf[4 * (len(offsets) + len(indices)):size].cast('H')
+        self.adjacency = None
+
+    def neighbors(self):
+        """
+        :return: For each Space index, a memoryview over its neighbors' indices in the shared block
+        """
+        if self.adjacency is None:
+            offsets, indices = self.offsets, self.indices
+            self.adjacency = [indices[offsets[index]:offsets[index + 1]] for index in range(self.spaces)]
+        return self.adjacency
+
+    def set_faces(self, faces):
+        """
+        :param faces: The top_letter of every Space, in index order
+        :return: The tokens the face ids now refer to
+        """
+        tokens = sorted(set(faces))
+        ids = {token: n for n, token in enumerate(tokens)}
+        self.face_ids[:] = array('H', [ids[face] for face in faces])
+        return tokens
+
+    def close(self):
+        for view in self.adjacency or ():
+            view.release()
+        self.adjacency = None
+        for view in (self.offsets, self.indices, self.face_ids):
+            view.release()
+        self.memory.close()
+
+
+def start_shard_worker(name, x_width, y_width, dictionary, min_length, max_length, tokens=()):
+    """
+    Runs once in each worker process: attaches to the shared Board and loads the dictionary's Trie.
+    :param tokens: The distribution's face tokens, so the Trie has shortcuts for multi-character faces
+    """
+    global worker_board, worker_trie
+    worker_board = SharedBoard(x_width, y_width, name=name)
+    worker_trie = dictionary_cache.get(dictionary, min_length, max_length).build_trie(tokens)
+
+
+def solve_shard(tokens, start, stop):
+    """
+    :param tokens: The lowercase faces that the shared face ids refer to
+    :return: The set of words in the dictionary Trie that can be traced from the Spaces numbered start to stop - 1
+    """
+    faces = [tokens[face_id] for face_id in worker_board.face_ids]
+    return search_paths(worker_trie, faces, worker_board.neighbors(), range(start, stop))
+
+
+class ShardedSolver:
+    """
+    A pool of worker processes that solve Boards of one shape for one Boggle configuration.  Solve any number of
+    Boards with find_all_words, then call close.
+    """
+
+    def __init__(self, game, workers=None, shards_per_worker=4):
+        """
+        :param game: The Boggle instance whose dictionary, length bounds and grid size to solve for
+        :param workers: The number of worker processes; defaults to the number of CPUs
+        :param shards_per_worker: The number of shards each Board is split into per worker, so a worker that draws
+        quick shards can take on more of them
+        """
+        self.workers = workers or os.cpu_count()
+        self.shards = self.workers * shards_per_worker
+        self.board = SharedBoard(game.x_width, game.y_width)
+        self.pool = ProcessPoolExecutor(max_workers=self.workers, initializer=start_shard_worker,
+                                        initargs=(self.board.memory.name, game.x_width, game.y_width, game.dictionary,
+                                                  game.scoring_model[1][0], game.x_width * game.y_width,
+                                                  game.distribution.tokens))
+
+    def warm_up(self):
+        """
+        Starts every worker, so that loading the dictionary in each is not counted against the first Board solved.
+        """
+        wait([self.pool.submit(os.getpid) for _ in range(self.workers)])
+
+    def find_all_words(self, game):
+        """
+        :return: The same set of words as game.find_all_words(), found by searching shards of game's Board in parallel
+        """
+        tokens = self.board.set_faces([face.lower() for face in game.board.faces()])
+        spaces = self.board.spaces
+        bounds = [spaces * shard // self.shards for shard in range(self.shards + 1)]
+        futures = [self.pool.submit(solve_shard, tokens, start, stop) for start, stop in zip(bounds, bounds[1:])
+                   if start < stop]
+        found = set()
+        for future in futures:
+            found |= future.result()
+        return {word for word in found if word in game.boggle_words}
+
+    def close(self):
+        self.pool.shutdown()
+        self.board.close()
+        self.board.memory.unlink()
@@ -0,0 +1,205 @@
+import argparse
+import json
+import os
+import random
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from boggle import Boggle, LetterDistribution, Player
+from boggle_generator import BoardBatch
+
+"""
+Headless, multi-process Boggle simulation for tuning scoring_model and board sizes.  Bot players pick words from each
+Board's solved word list according to a skill model, games are scored exactly as Boggle.score_round scores them, and
+only aggregate statistics are kept:
+    python boggle_simulation.py --games 100000 --grid 4 4 --skills 0.2 0.4 0.6
+"""
+
+
+class UniformSkill:
+    """
+    Finds each word on the Board with the same probability.
+    """
+
+    def __init__(self, find_rate):
+        self.find_rate = find_rate
+
+    def choose(self, words, rng):
+        return [word for word in words if rng.random() < self.find_rate]
+
+    def __repr__(self):
+        return f'UniformSkill({self.find_rate})'
+
+
+class LengthBiasedSkill:
+    """
+    Finds words of min_length letters with probability find_rate, and each extra letter multiplies that by decay, so
+    long words are found less often.
+    """
+
+    def __init__(self, find_rate, decay=0.7, min_length=3):
+        self.find_rate = find_rate
+        self.decay = decay
+        self.min_length = min_length
+
+    def choose(self, words, rng):
+        rates = {}
+        chosen = []
+        for word in words:
+            if len(word) not in rates:
+                rates[len(word)] = self.find_rate * self.decay ** max(0, len(word) - self.min_length)
+            if rng.random() < rates[len(word)]:
+                chosen.append(word)
+        return chosen
+
+    def __repr__(self):
+        return f'LengthBiasedSkill({self.find_rate}, {self.decay}, {self.min_length})'
+
+
+class SimulationStats:
+    """
+    Running totals over simulated games: per-bot score histograms, means and wins, and how often found words were
+    shared (and so scored 0).  Stats from different workers are combined with merge.
+    """
+
+    def __init__(self, bots):
+        self.bots = bots
+        self.games = 0
+        self.rounds = 0
+        self.score_histograms = [Counter() for _ in range(bots)]
+        self.score_totals = [0] * bots
+        self.score_squares = [0] * bots
+        self.wins = [0] * bots
+        self.words_on_boards = 0
+        self.words_found = 0
+        self.words_shared = 0
+
+    def merge(self, other):
+        self.games += other.games
+        self.rounds += other.rounds
+        for bot in range(self.bots):
+            self.score_histograms[bot].update(other.score_histograms[bot])
+            self.score_totals[bot] += other.score_totals[bot]
+            self.score_squares[bot] += other.score_squares[bot]
+            self.wins[bot] += other.wins[bot]
+        self.words_on_boards += other.words_on_boards
+        self.words_found += other.words_found
+        self.words_shared += other.words_shared
+        return self
+
+    def record_game(self, scores):
+        self.games += 1
+        best = max(scores)
+        for bot, score in enumerate(scores):
+            self.score_histograms[bot][score] += 1
+            self.score_totals[bot] += score
+            self.score_squares[bot] += score * score
+            if score == best:
+                self.wins[bot] += 1
+
+    def summary(self):
+        games = self.games or 1
+        means = [total / games for total in self.score_totals]
+        return {
+            'games': self.games,
+            'rounds': self.rounds,
+            'mean_scores': means,
+            'score_std': [max(0.0, squares / games - mean * mean) ** 0.5
+                          for squares, mean in zip(self.score_squares, means)],
+            'win_rates': [wins / games for wins in self.wins],
+            'mean_words_per_board': self.words_on_boards / (self.rounds or 1),
+            'shared_word_rate': self.words_shared / (self.words_found or 1),
+            'score_histograms': [dict(sorted(histogram.items())) for histogram in self.score_histograms],
+        }
+
+
+worker_game = None
+
+
+def start_worker(grid_size, rounds, dictionary, scoring_model, distribution=None):
+    """
+    Runs once in each worker process: one Boggle instance, and so one dictionary, Trie and adjacency table, serves every
+    game the worker simulates.
+    """
+    global worker_game
+    worker_game = Boggle(grid_size, rounds, dictionary=dictionary, scoring_model=scoring_model, compact_board=True,
+                         distribution=distribution)
+    worker_game.build_word_trie()
+
+
+def simulate_chunk(seed, games, skills):
+    """
+    Simulates games games in a worker process.
+    :return: The SimulationStats for those games
+    """
+    game = worker_game
+    rng = random.Random(seed)
+    rounds = game.max_rounds
+    boards = BoardBatch(games * rounds, game.board.grid_size, seed=seed, distribution=game.distribution)
+    stats = SimulationStats(len(skills))
+    for n in range(games):
+        game.players = [Player(name=f'Bot {bot}') for bot in range(len(skills))]
+        for player in game.players:
+            player.build_score_dict(max_rounds=rounds)
+        for game.current_round in range(rounds):
+            game.board = boards[n * rounds + game.current_round]
+            words = sorted(game.find_all_words())
+            for player, skill in zip(game.players, skills):
+                player.words[game.current_round] = game.scorer.score_words(skill.choose(words, rng))
+            finders = Counter(word for player in game.players for word in player.words[game.current_round])
+            stats.words_on_boards += len(words)
+            stats.words_found += sum(finders.values())
+            stats.words_shared += sum(count for count in finders.values() if count > 1)
+            game.score_round()
+            stats.rounds += 1
+        stats.record_game([player.score for player in game.players])
+    return stats
+
+
+def simulate(games, grid_size, skills, rounds=1, dictionary='boggle_words.txt', scoring_model=None, workers=None,
+             chunk_size=100, seed=0, distribution=None):
+    """
+    Simulates games games across a pool of worker processes.
+    :param skills: One skill model (e.g. UniformSkill) per bot player
+    :param distribution: The LetterDistribution Boards are drawn from; ENGLISH if not given
+    :return: A generator of running SimulationStats, one as each chunk of chunk_size games finishes; each is a copy,
+    so it is not changed by later chunks
+    """
+    workers = workers or os.cpu_count()
+    total = SimulationStats(len(skills))
+    chunks = [(seed + n, min(chunk_size, games - start)) for n, start in enumerate(range(0, games, chunk_size))]
+    with ProcessPoolExecutor(max_workers=workers, initializer=start_worker,
+                             initargs=(grid_size, rounds, dictionary, scoring_model, distribution)) as pool:
+        queued = iter(chunks)
+        pending = {pool.submit(simulate_chunk, chunk_seed, count, skills)
+                   for chunk_seed, count in (next(queued) for _ in range(min(len(chunks), 2 * workers)))}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                total.merge(future.result())
+                for chunk_seed, count in queued:
+                    pending.add(pool.submit(simulate_chunk, chunk_seed, count, skills))
+                    break
+                yield SimulationStats(total.bots).merge(total)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Simulate Boggle games between bot players')
+    parser.add_argument('--games', type=int, default=1000)
+    parser.add_argument('--grid', type=int, nargs=2, default=(4, 4), metavar=('X_WIDTH', 'Y_WIDTH'))
+    parser.add_argument('--rounds', type=int, default=1)
+    parser.add_argument('--skills', type=float, nargs='+', default=[0.2, 0.4], help='find rate of each bot')
+    parser.add_argument('--decay', type=float, help='use LengthBiasedSkill with this decay per extra letter')
+    parser.add_argument('--dictionary', default='boggle_words.txt')
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--chunk-size', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--weights', help='JSON file mapping each face token to its weight, instead of English dice')
+    args = parser.parse_args()
+    distribution = LetterDistribution(json.load(open(args.weights, 'r'))) if args.weights else None
+    bots = [UniformSkill(rate) if args.decay is None else LengthBiasedSkill(rate, args.decay) for rate in args.skills]
+    for stats in simulate(args.games, tuple(args.grid), bots, rounds=args.rounds, dictionary=args.dictionary,
+                          workers=args.workers, chunk_size=args.chunk_size, seed=args.seed, distribution=distribution):
+        summary = stats.summary()
+        del summary['score_histograms']
+        print(json.dumps(summary))
+    print(json.dumps(stats.summary()))
@@ -0,0 +1,291 @@
+import argparse
+import json
+import mmap
+import struct
+import sys
+import time
+from array import array
+from boggle import ENGLISH, Board, Boggle, CompactBoard, Cube, LetterDistribution
+from boggle_generator import generate_boards
+
+"""
+A binary file of many Boards, for shipping pre-generated Boards to game servers.  SnapshotWriter appends Boards one at a
+time and SnapshotReader opens the file with mmap and rebuilds any one of them by number, reading only that record:
+    python boggle_snapshot.py tournament.bogs --count 1000 --grid 4 4 --min-words 40
+
+Layout (little-endian):
+    header:   MAGIC, VERSION, record count, token count, word count (uint32), then the offsets of the record index,
+              the token table and the word table (uint64)
+    records:  x_width, y_width (uint16), the number of solution words or NO_WORDS (uint32), then for every Space in
+              index order the token id of each of its Cube's six letters (uint16 * 6), then the token id of every
+              Space's top_letter (uint16), then the solution's word ids (uint32 each)
+    index:    the offset of every record, then the end of the last one (uint64 * (records + 1))
+    tokens:   every face token, as a length (uint8) and its UTF-8 bytes
+    words:    the offset of every solution word in the blob that follows, then the blob's length (uint32 * (words + 1)),
+              then the UTF-8 bytes of every word
+"""
+
+MAGIC = 0x534f4742
+VERSION = 1
+HEADER = struct.Struct('<5I3Q')
+RECORD = struct.Struct('<2HI')
+NO_WORDS = 0xffffffff
+FACES = 6
+MAX_TOKEN_BYTES = 0xff
+
+
+def little_endian(typecode, data):
+    """
+    :return: data read as an array of typecode, swapped into native byte order if need be
+    """
+    values = array(typecode, data)
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return values
+
+
+class SnapshotWriter:
+    """
+    Writes Boards to path, which is only a valid snapshot once close has been called.
+    """
+
+    def __init__(self, path, distribution=None):
+        """
+        :param distribution: The LetterDistribution the Boards were made from.  Its tokens are numbered first, in
+        order, so a reader using the same distribution can build CompactBoards without renumbering any faces.
+        """
+        self.path = path
+        self.tokens = []
+        self.token_ids = {}
+        for token in (distribution or ENGLISH).tokens:
+            self.token_id(token)
+        self.handle = open(path, 'wb')
+        self.handle.write(bytes(HEADER.size))
+        self.offsets = array('Q', [HEADER.size])
+        self.words = []
+        self.word_ids = {}
+
+    def token_id(self, token):
+        """
+        :return: token's number in the token table, adding it if it is new
+        """
+        if token not in self.token_ids:
+            if len(token.encode()) > MAX_TOKEN_BYTES:
+                raise ValueError(f'Face token {token[:20]!r}... is {len(token.encode())} bytes in UTF-8, but a snapshot '
+                                 f'can only hold tokens of up to {MAX_TOKEN_BYTES}')
+            self.token_ids[token] = len(self.tokens)
+            self.tokens.append(token)
+        return self.token_ids[token]
+
+    def word_id(self, word):
+        if word not in self.word_ids:
+            self.word_ids[word] = len(self.words)
+            self.words.append(word)
+        return self.word_ids[word]
+
+    def add(self, board, words=None):
+        """
+        :param board: A Board or CompactBoard; its Cubes are recorded in the order of the Spaces they sit on
+        :param words: Optionally, the words on board, e.g. from Boggle.find_all_words
+        """
+        cubes = [space.cube for row in board.spaces for space in row]
+        if any(len(cube.letters) != FACES for cube in cubes):
+            raise ValueError(f'Every Cube needs {FACES} letters to be written to a snapshot')
+        letters = array('H', [self.token_id(letter) for cube in cubes for letter in cube.letters])
+        tops = array('H', [self.token_id(cube.top_letter) for cube in cubes])
+        ids = array('I', [] if words is None else [self.word_id(word) for word in sorted(words)])
+        for values in (letters, tops, ids):
+            if sys.byteorder != 'little':
+                values.byteswap()
+        self.handle.write(RECORD.pack(board.x_width, board.y_width, NO_WORDS if words is None else len(ids)))
+        self.handle.write(letters.tobytes() + tops.tobytes() + ids.tobytes())
+        self.offsets.append(self.handle.tell())
+
+    def close(self):
+        index_offset = self.offsets[-1]
+        offsets = array('Q', self.offsets)
+        if sys.byteorder != 'little':
+            offsets.byteswap()
+        self.handle.write(offsets.tobytes())
+        token_offset = self.handle.tell()
+        for token in self.tokens:
+            encoded = token.encode()
+            self.handle.write(bytes([len(encoded)]) + encoded)
+        word_offset = self.handle.tell()
+        blob = [word.encode() for word in self.words]
+        starts = array('I', [0])
+        for encoded in blob:
+            starts.append(starts[-1] + len(encoded))
+        if sys.byteorder != 'little':
+            starts.byteswap()
+        self.handle.write(starts.tobytes() + b''.join(blob))
+        self.handle.seek(0)
+        self.handle.write(HEADER.pack(MAGIC, VERSION, len(self.offsets) - 1, len(self.tokens), len(self.words),
+                                      index_offset, token_offset, word_offset))
+        self.handle.close()
+
+
+def write_snapshots(path, boards, solutions=None, distribution=None):
+    """
+    :param boards: An iterable of Boards or CompactBoards
+    :param solutions: Optionally, an iterable of the words on each of boards, in the same order
+    :param distribution: As for SnapshotWriter
+    :return: The number of Boards written
+    """
+    writer = SnapshotWriter(path, distribution=distribution)
+    solutions = iter(solutions) if solutions is not None else None
+    for board in boards:
+        writer.add(board, None if solutions is None else next(solutions))
+    writer.close()
+    return len(writer.offsets) - 1
+
+
+class SnapshotReader:
+    """
+    A read-only view of a file written by SnapshotWriter.  Opening it reads only the header and the token table; each
+    record is read when it is asked for.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as handle:
+            self.buffer = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count, token_count, self.word_count, index_offset, token_offset, word_offset = \
+            HEADER.unpack_from(self.buffer)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f'{path} is not a version {VERSION} Boggle snapshot')
+        self.offsets = self.view('Q', index_offset, self.count + 1)
+        self.tokens = []
+        position = token_offset
+        for _ in range(token_count):
+            length = self.buffer[position]
+            self.tokens.append(self.buffer[position + 1:position + 1 + length].decode())
+            position += 1 + length
+        self.word_starts = self.view('I', word_offset, self.word_count + 1)
+        self.blob_start = word_offset + 4 * (self.word_count + 1)
+
+    def view(self, typecode, offset, count):
+        """
+        :return: count values of typecode at offset: a memoryview over the mapped file where the byte order allows,
+        otherwise a copy
+        """
+        size = array(typecode).itemsize
+        if sys.byteorder == 'little':
+            return memoryview(self.buffer)[offset:offset + size * count].cast(typecode)
+        return little_endian(typecode, self.buffer[offset:offset + size * count])
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, n):
+        return self.board(n)
+
+    def __iter__(self):
+        return (self.board(n) for n in range(self.count))
+
+    def record(self, n):
+        """
+        :return: (grid_size, letters, tops, word ids or None) of board n, with letters and tops as arrays of token ids
+        """
+        if not 0 <= n < self.count:
+            raise IndexError(f'Board {n} is outside a snapshot of {self.count}')
+        start = self.offsets[n]
+        x_width, y_width, word_count = RECORD.unpack_from(self.buffer, start)
+        cells = x_width * y_width
+        start += RECORD.size
+        letters = little_endian('H', self.buffer[start:start + 2 * FACES * cells])
+        start += 2 * FACES * cells
+        tops = little_endian('H', self.buffer[start:start + 2 * cells])
+        start += 2 * cells
+        ids = None if word_count == NO_WORDS else little_endian('I', self.buffer[start:start + 4 * word_count])
+        return (x_width, y_width), letters, tops, ids
+
+    def grid_size(self, n):
+        return RECORD.unpack_from(self.buffer, self.offsets[n])[:2]
+
+    def faces(self, n):
+        """
+        :return: The top_letter of every Space of board n, in index order, without building the board
+        """
+        tokens = self.tokens
+        return [tokens[x] for x in self.record(n)[2]]
+
+    def word(self, word_id):
+        start = self.blob_start + self.word_starts[word_id]
+        return self.buffer[start:start + self.word_starts[word_id + 1] - self.word_starts[word_id]].decode()
+
+    def words(self, n):
+        """
+        :return: The frozenset of words recorded with board n, or None if it was written without them
+        """
+        ids = self.record(n)[3]
+        return None if ids is None else frozenset(self.word(word_id) for word_id in ids)
+
+    def board(self, n, compact=False, distribution=None):
+        """
+        :param compact: Whether to return a CompactBoard or (the default) a Board
+        :param distribution: The LetterDistribution the board's Cubes are rerolled from by make_cubes
+        """
+        grid_size, letters, tops, _ = self.record(n)
+        tokens = self.tokens
+        if compact:
+            board = CompactBoard(grid_size, letters=letters, tops=tops, distribution=distribution)
+            ids = [board.token_id(token) for token in tokens]
+            if ids != list(range(len(ids))):
+                board.letters = array('H', [ids[x] for x in letters])
+                board.tops = array('H', [ids[x] for x in tops])
+            return board
+        board = Board(grid_size, cubes=[Cube(letters=[tokens[x] for x in letters[FACES * cube:FACES * cube + FACES]])
+                                        for cube in range(len(tops))], distribution=distribution)
+        for cube, top in zip(board.cubes, tops):
+            cube.top_letter = tokens[top]
+        return board
+
+    def load(self, board, n):
+        """
+        Turns board, which must have the grid size of board n, into board n by rewriting its Cubes in place, which is
+        cheaper than building a new Board.
+        """
+        grid_size, letters, tops, _ = self.record(n)
+        if grid_size != (board.x_width, board.y_width):
+            raise ValueError(f'Board {n} is {grid_size[0]}x{grid_size[1]}, not {board.x_width}x{board.y_width}')
+        tokens = self.tokens
+        for index, space in enumerate(space for row in board.spaces for space in row):
+            cube = space.cube
+            cube.letters = [tokens[x] for x in letters[FACES * index:FACES * index + FACES]]
+            cube.top_letter = tokens[tops[index]]
+
+    def game(self, n, compact=False, **options):
+        """
+        :param options: Passed on to Boggle, e.g. dictionary or distribution
+        :return: A one-round Boggle instance playing on board n
+        """
+        game = Boggle(self.grid_size(n), 1, compact_board=compact, **options)
+        game.board = self.board(n, compact=compact, distribution=game.distribution)
+        return game
+
+    def close(self):
+        for view in (self.offsets, self.word_starts):
+            if isinstance(view, memoryview):
+                view.release()
+        self.buffer.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate Boards and write them, with their solutions, to a snapshot')
+    parser.add_argument('path')
+    parser.add_argument('--count', type=int, default=1000)
+    parser.add_argument('--grid', type=int, nargs=2, default=(4, 4), metavar=('X_WIDTH', 'Y_WIDTH'))
+    parser.add_argument('--min-words', type=int, default=0)
+    parser.add_argument('--min-score', type=int, default=0)
+    parser.add_argument('--dictionary', default='boggle_words.txt')
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--weights', help='JSON file mapping each face token to its weight, instead of English dice')
+    args = parser.parse_args()
+    distribution = LetterDistribution(json.load(open(args.weights, 'r'))) if args.weights else ENGLISH
+    start = time.perf_counter()
+    generated = list(generate_boards(args.count, tuple(args.grid), min_words=args.min_words, min_score=args.min_score,
+                                     dictionary=args.dictionary, seed=args.seed, distribution=distribution))
+    written = write_snapshots(args.path, (x.board for x in generated), (x.words for x in generated),
+                              distribution=distribution)
+    print(f'Wrote {written} boards to {args.path} in {time.perf_counter() - start:.1f} s')
@@ -0,0 +1,145 @@
+import hashlib
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from boggle import Solution
+
+
+@lru_cache(maxsize=None)
+def symmetries(x_width, y_width):
+    """
+    :return: For each rotation or reflection that maps an x_width by y_width Board onto itself, a tuple giving the index
+    of the Space that lands on each position.  Square Boards have 8, other rectangles 4.  These all preserve adjacency,
+    so they never change which words a Board holds.
+    """
+    transforms = [lambda x, y: (x, y), lambda x, y: (x_width - 1 - x, y), lambda x, y: (x, y_width - 1 - y),
+                  lambda x, y: (x_width - 1 - x, y_width - 1 - y)]
+    if x_width == y_width:
+        transforms += [lambda x, y: (y, x), lambda x, y: (y_width - 1 - y, x), lambda x, y: (y, x_width - 1 - x),
+                       lambda x, y: (y_width - 1 - y, x_width - 1 - x)]
+    permutations = set()
+    for transform in transforms:
+        permutations.add(tuple(transform(x, y)[1] * x_width + transform(x, y)[0]
+                               for y in range(y_width) for x in range(x_width)))
+    return tuple(sorted(permutations))
+
+
+def board_signature(faces, x_width, y_width):
+    """
+    :param faces: The top_letter of every Space, in index order
+    :return: A string identifying the Board's layout, which is the same for all of its rotations and reflections
+    """
+    faces = [face.lower() for face in faces]
+    layout = min(tuple(faces[index] for index in permutation) for permutation in symmetries(x_width, y_width))
+    return f'{x_width}x{y_width}:' + ','.join(layout)
+
+
+def solving_context(game):
+    """
+    :return: A fingerprint of everything other than the Board that a Solution depends on: the dictionary file (path,
+    modification time and size), the word length bounds and the scoring_model
+    """
+    stat = os.stat(game.dictionary)
+    context = (os.path.abspath(game.dictionary), stat.st_mtime_ns, stat.st_size, game.scoring_model[1][0],
+               game.x_width * game.y_width, tuple(tuple(x) for x in game.scoring_model))
+    return hashlib.sha1(repr(context).encode()).hexdigest()
+
+
+class SolutionCache:
+    """
+    Caches Solutions by board_signature, so a Board that comes back (or a rotation or reflection of it) is not solved
+    again.  Keys include solving_context, so changing the dictionary or the scoring_model never returns a stale
+    Solution.
+
+    Solutions are kept in an in-memory LRU of max_entries and, if path is given, in an sqlite database there that
+    outlives the process.
+    """
+
+    def __init__(self, max_entries=4096, path=None):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.path = path
+        self.connection = None
+        self.lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        if path is not None:
+            self.connection = sqlite3.connect(path, check_same_thread=False)
+            self.connection.execute('CREATE TABLE IF NOT EXISTS solutions (context TEXT, signature TEXT, words TEXT, '
+                                    'max_score INTEGER, PRIMARY KEY (context, signature))')
+            self.connection.commit()
+
+    def solve(self, game):
+        """
+        :return: The Solution for game's Board, from the cache if possible, otherwise solved and then cached
+        """
+        key = (solving_context(game), board_signature(game.board.faces(), game.x_width, game.y_width))
+        solution = self.get(key)
+        if solution is None:
+            with self.lock:
+                self.misses += 1
+            solution = game.solve()
+            self.put(key, solution)
+        return solution
+
+    def get(self, key):
+        """
+        :return: The Solution stored under key, in memory or on disk, or None; hits and misses are counted under lock
+        """
+        with self.lock:
+            if key in self.entries:
+                self.memory_hits += 1
+                self.entries.move_to_end(key)
+                return self.entries[key]
+            if self.connection is None:
+                return None
+            row = self.connection.execute('SELECT words, max_score FROM solutions WHERE context = ? AND signature = ?',
+                                          key).fetchone()
+            if row is None:
+                return None
+            self.disk_hits += 1
+        solution = Solution(frozenset(row[0].split('\n')) - {''}, row[1])
+        self.remember(key, solution)
+        return solution
+
+    def put(self, key, solution):
+        self.remember(key, solution)
+        if self.connection is not None:
+            with self.lock:
+                self.connection.execute('INSERT OR REPLACE INTO solutions VALUES (?, ?, ?, ?)',
+                                        key + ('\n'.join(sorted(solution.words)), solution.max_score))
+                self.connection.commit()
+
+    def remember(self, key, solution):
+        with self.lock:
+            self.entries[key] = solution
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def discard_stale(self, game):
+        """
+        Deletes every stored Solution that was solved with a different dictionary or scoring_model than game's.
+        """
+        context = solving_context(game)
+        with self.lock:
+            for key in [key for key in self.entries if key[0] != context]:
+                del self.entries[key]
+            if self.connection is not None:
+                self.connection.execute('DELETE FROM solutions WHERE context != ?', (context,))
+                self.connection.commit()
+
+    def stats(self):
+        with self.lock:
+            return {'memory_hits': self.memory_hits, 'disk_hits': self.disk_hits, 'misses': self.misses,
+                    'evictions': self.evictions, 'entries': len(self.entries)}
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
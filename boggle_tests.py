@@ -1,5 +1,24 @@
+import asyncio
+import os
+import tempfile
 import unittest
-from boggle import Boggle, Player
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
+from boggle import ALPHABET, Boggle, LetterDistribution, Player, Scorer, build_adjacency
+from boggle_history import GameHistory, HistoryReader
+from boggle_instrumentation import CallbackSink, Instrumentation, MemorySink
+from boggle_optimizer import BoardOptimizer
+from boggle_incremental import IncrementalValidator, Keystroke
+from boggle_benchmark_suite import ScriptedInterface, find_regressions
+from boggle_server import BoggleServer, GameRoom
+import boggle_sharded
+from boggle_sharded import ShardedSolver, start_shard_worker
+from boggle_simulation import UniformSkill, simulate
+from boggle_snapshot import SnapshotReader, SnapshotWriter, write_snapshots
+from boggle_solutions import SolutionCache, board_signature
+from boggle_generator import BoardBatch, generate_boards
+from boggle_dictionary import CompiledDictionary, DictionaryCache, Prefetch, SignatureIndex, Trie, \
+    compile_dictionary, dictionary_cache, load_words
 from itertools import permutations
 
 """
@@ -234,6 +253,22 @@ class TestScoringSystem(unittest.TestCase):
         for word in test_strings.keys():
             self.assertEqual(test_strings[word], boggle_instance.score_word(word))
 
+    def test_scorer_matches_scoring_model(self):
+        scoring_models = [[(0, 0), (3, 1), (4, 1), (5, 2), (6, 3), (7, 5), (8, 11)], [(2, 5), (3, 1), (9, 4)],
+                          [(0, 1), (5, 0), (4, 7)], [(0, 3)]]
+        for scoring_model in scoring_models:
+            scorer = Scorer(scoring_model, 6)
+            words = ['x' * length for length in range(30)]
+            for word in words:
+                expected = scoring_model[-1][1]
+                for idx, tup in enumerate(scoring_model):
+                    if len(word) < tup[0]:
+                        expected = scoring_model[idx - 1][1]
+                        break
+                self.assertEqual(expected, scorer(word))
+            self.assertEqual({word: scorer(word) for word in words}, scorer.score_words(words))
+            self.assertEqual(sum(scorer(word) for word in words), scorer.total(words))
+
     def test_round_scoring(self):
         """
         The tests in this method have the side effect of validating that Boggle supports more than one Player
@@ -271,8 +306,698 @@ class TestScoringSystem(unittest.TestCase):
         self.assertEqual({0: {'here': 1, 'there': 2, 'everywhere': 11}, 1: {'somewhere': 11, 'anywhere': 11, 'far': 1, 'near': 0, 'massing': 5}}, boggle_instance.players[1].words)
 
 
+class TestFindAllWords(unittest.TestCase):
+
+    def test_find_all_words(self):
+        dictionary = HelperMethods.write_dictionary(['abe', 'bead', 'fed', 'hied', 'ace', 'abc', 'cab', 'queen', 'quiz', 'aaa'])
+        boggle_instance = HelperMethods.configure_board_for_test('abcdefghi', Boggle((3, 3), 1, dictionary=dictionary))
+        # [['a', 'b', 'c'],
+        #  ['d', 'e', 'f'],
+        #  ['g', 'h', 'i']]
+        self.assertEqual({'abe', 'bead', 'fed', 'hied', 'abc'}, boggle_instance.find_all_words())
+        self.assertEqual({word for word in boggle_instance.boggle_words if boggle_instance.find_word(word.upper())},
+                         boggle_instance.find_all_words())
+
+    def test_find_all_words_multi_character_top_letter(self):
+        dictionary = HelperMethods.write_dictionary(['queen', 'quiz', 'quit', 'que'])
+        boggle_instance = HelperMethods.configure_board_for_test('xeenz', Boggle((5, 1), 1, dictionary=dictionary))
+        boggle_instance.board.spaces[0][0].cube.top_letter = 'Qu'
+        self.assertEqual({'queen', 'que'}, boggle_instance.find_all_words())
+
+    def test_words_longer_than_the_recursion_limit(self):
+        dictionary = HelperMethods.write_dictionary(['abe', 'bead'])
+        boggle_instance = Boggle((3000, 1), 1, dictionary=dictionary, compact_board=True)
+        word = ''.join(boggle_instance.board.faces())
+        self.assertTrue(boggle_instance.trace_word(word.upper()))
+        self.assertFalse(boggle_instance.trace_word(word.upper() + '#'))
+        faces = [face.lower() for face in boggle_instance.board.faces()]
+        self.assertEqual({word.lower()}, boggle_instance.search_board(Trie([word.lower(), 'zzzzzzzz']), faces))
+
+
+class TestSignatureIndex(unittest.TestCase):
+
+    def test_candidates_fit_the_face_multiset(self):
+        index = SignatureIndex(['queen', 'quiz', 'que', 'seen', 'sees', 'ness', 'sun', 'ens'])
+        self.assertEqual({'queen', 'que', 'seen', 'sees', 'ens', 'ness', 'sun'},
+                         set(index.candidates(Counter(''.join(['qu', 'e', 'e', 'n', 's', 's'])))))
+        self.assertEqual({'que', 'ens', 'sun'}, set(index.candidates(Counter('quens'))))
+        self.assertEqual([], index.candidates(Counter('xyz')))
+
+    def test_sparse_boards_solve_against_their_candidates(self):
+        dictionary = HelperMethods.write_dictionary(['llama', 'calle', 'ocho', 'chal', 'sol', 'llos', 'ella', 'eso',
+                                                     'chela', 'lloss', 'asa', 'ala', 'oso', 'cola', 'zorro', 'quizas'])
+        distribution = LetterDistribution({'A': 3, 'E': 3, 'L': 2, 'Ll': 1, 'Ch': 1, 'O': 2, 'S': 2})
+        for compact_board in (False, True):
+            boggle_instance = Boggle((4, 4), 1, dictionary=dictionary, distribution=distribution,
+                                     compact_board=compact_board)
+            for _ in range(5):
+                candidates = boggle_instance.candidate_words()
+                self.assertNotIn('zorro', candidates)
+                self.assertTrue(boggle_instance.find_all_words() <= candidates)
+                self.assertEqual({word for word in boggle_instance.boggle_words
+                                  if boggle_instance.find_word(word.upper())}, boggle_instance.find_all_words())
+                self.assertTrue(boggle_instance.check_if_valid_english('zorro'))
+                boggle_instance.board.shake_cubes()
+
+    def test_play_does_not_build_the_index(self):
+        dictionary = HelperMethods.write_dictionary(['abe', 'bead', 'fed', 'hied'])
+        boggle_instance = HelperMethods.configure_board_for_test('aaabbbeee', Boggle((3, 3), 1, dictionary=dictionary))
+        self.assertEqual({'ABE': 1}, boggle_instance.validate_words(['ABE', 'FED']))
+        self.assertTrue(boggle_instance.find_word('ABE'))
+        self.assertIsNone(boggle_instance.load_dictionary().signature_index)
+
+    def test_dense_boards_skip_the_index(self):
+        dictionary = HelperMethods.write_dictionary(['abe', 'bead', 'fed', 'hied', 'jello'])
+        boggle_instance = HelperMethods.configure_board_for_test('abcdefghijklmnop',
+                                                                 Boggle((4, 4), 1, dictionary=dictionary))
+        self.assertIsNone(boggle_instance.candidate_words())
+        self.assertEqual({'abe'}, boggle_instance.find_all_words())
+
+
+class TestShardedSolver(unittest.TestCase):
+
+    def test_shards_find_the_same_words(self):
+        tokens = [token.lower() for token in ALPHABET]
+        dictionary = HelperMethods.write_dictionary([a + b + c for a in tokens for b in 'aeiou' for c in tokens])
+        boggle_instance = Boggle((12, 9), 1, dictionary=dictionary)
+        solver = ShardedSolver(boggle_instance, workers=2, shards_per_worker=3)
+        try:
+            for _ in range(3):
+                self.assertEqual(boggle_instance.find_all_words(), solver.find_all_words(boggle_instance))
+                boggle_instance.board.shake_cubes()
+        finally:
+            solver.close()
+
+    def test_shards_follow_multi_character_faces(self):
+        dictionary = HelperMethods.write_dictionary(['then', 'than', 'that', 'thee', 'neath', 'hate', 'tenth'])
+        distribution = LetterDistribution({'Th': 3, 'E': 2, 'A': 2, 'N': 1})
+        boggle_instance = Boggle((4, 4), 1, dictionary=dictionary, distribution=distribution)
+        solver = ShardedSolver(boggle_instance, workers=2)
+        try:
+            for _ in range(3):
+                self.assertEqual(boggle_instance.find_all_words(), solver.find_all_words(boggle_instance))
+                boggle_instance.board.shake_cubes()
+            start_shard_worker(solver.board.memory.name, 4, 4, dictionary, 3, 16, distribution.tokens)
+            self.assertIn('th', boggle_sharded.worker_trie.tokens)
+            boggle_sharded.worker_board.close()
+        finally:
+            solver.close()
+
+
+class TestValidateWords(unittest.TestCase):
+
+    def test_validate_words_matches_find_word(self):
+        dictionary = HelperMethods.write_dictionary(['abe', 'bead', 'beaded', 'fed', 'hied', 'abc', 'cab', 'queen', 'zed'])
+        boggle_instance = HelperMethods.configure_board_for_test('abcdefghi', Boggle((3, 3), 1, dictionary=dictionary))
+        # [['a', 'b', 'c'],
+        #  ['d', 'e', 'f'],
+        #  ['g', 'h', 'i']]
+        words = ['BEAD', 'ABE', 'CAB', 'BEADED', 'ZED', 'QUEEN', 'FED', 'HIED', 'ABC', 'BEAD', 'FEDS', 'bead']
+        self.assertEqual({'BEAD': 1, 'ABE': 1, 'FED': 1, 'HIED': 1, 'ABC': 1}, boggle_instance.validate_words(words))
+        self.assertEqual({word: boggle_instance.score_word(word) for word in words if boggle_instance.find_word(word)},
+                         boggle_instance.validate_words(words))
+
+
+class TestCompactBoard(unittest.TestCase):
+
+    def test_compact_board_matches_board(self):
+        dictionary = HelperMethods.write_dictionary(['abe', 'bead', 'fed', 'hied', 'abc', 'cab', 'queen'])
+        test_string = 'abcdefghi'
+        board_instance = HelperMethods.configure_board_for_test(test_string, Boggle((3, 3), 1, dictionary=dictionary))
+        compact_instance = HelperMethods.configure_board_for_test(test_string, Boggle((3, 3), 1, dictionary=dictionary,
+                                                                                      compact_board=True))
+        self.assertEqual(board_instance.board.faces(), compact_instance.board.faces())
+        self.assertEqual(board_instance.find_all_words(), compact_instance.find_all_words())
+        for word in ['ABCFEDGHI', 'EABCFIHG', 'IHGA', 'IHGC', 'IHGG']:
+            self.assertEqual(board_instance.trace_word(word), compact_instance.trace_word(word))
+        compact_instance.board.spaces[2][1].cube.top_letter = 'Quack'
+        self.assertEqual(True, compact_instance.trace_word('QUACK'))
+        self.assertEqual([space.x_coord for space in compact_instance.board.spaces[1][1].adjacents],
+                         [space.x_coord for space in board_instance.board.spaces[1][1].adjacents])
+        for index, neighbors in enumerate(board_instance.board.adjacency):
+            self.assertEqual(list(neighbors), list(compact_instance.board.neighbors(index)))
+        shape = Boggle((7, 9), 1, dictionary=dictionary, compact_board=True).board
+        self.assertIsNone(shape.adjacency_offsets)
+        self.assertIsNone(shape.adjacency_table)
+        self.assertEqual([list(neighbors) for neighbors in build_adjacency(7, 9)],
+                         [list(shape.neighbors(index)) for index in range(63)])
+
+    def test_compact_board_rerolls(self):
+        board = Boggle((6, 4), 1, dictionary='test_words.txt', compact_board=True).board
+        letters = [cube.letters for cube in board.cubes]
+        board.shuffle_cubes()
+        board.reassign_cubes()
+        board.shake_cubes()
+        self.assertEqual(sorted(letters), sorted(space.cube.letters for row in board.spaces for space in row))
+        for row in board.spaces:
+            for space in row:
+                self.assertIn(space.cube.top_letter, space.cube.letters)
+
+
+class TestBoardBatch(unittest.TestCase):
+
+    def test_board_batch_is_reproducible(self):
+        batch = BoardBatch(5, (4, 3), seed=7)
+        self.assertEqual([batch.faces(n) for n in range(5)], [BoardBatch(5, (4, 3), seed=7).faces(n) for n in range(5)])
+        self.assertEqual(5, len(list(batch)))
+        for n in range(5):
+            compact = batch[n]
+            board = batch.board(n, compact=False)
+            self.assertEqual(batch.faces(n), compact.faces())
+            self.assertEqual(batch.faces(n), board.faces())
+            self.assertEqual([cube.letters for cube in compact.cubes], [cube.letters for cube in board.cubes])
+            for row in board.spaces:
+                for space in row:
+                    self.assertIn(space.cube.top_letter, space.cube.letters)
+        self.assertRaises(IndexError, batch.board, 5)
+
+    def test_board_batch_draws_from_its_distribution(self):
+        for weights in ({'Qu': 1, 'X': 2, 'Z': 3}, {'Qu': 0.5, 'X': 1.5, 'Z': 2.25}):
+            distribution = LetterDistribution(weights)
+            batch = BoardBatch(4, (3, 3), seed=11, distribution=distribution)
+            self.assertEqual([batch.faces(n) for n in range(4)],
+                             [BoardBatch(4, (3, 3), seed=11, distribution=distribution).faces(n) for n in range(4)])
+            for n in range(4):
+                self.assertIs(distribution, batch[n].distribution)
+                self.assertEqual(batch.faces(n), batch.board(n, compact=False).faces())
+                for cube in batch[n].cubes:
+                    self.assertTrue(set(cube.letters) <= set(weights))
+
+
+class TestGenerateBoards(unittest.TestCase):
+
+    def test_generated_boards_meet_quality_bar(self):
+        vowels, consonants = 'aeiou', 'bcdfghlmnprst'
+        dictionary = HelperMethods.write_dictionary([v + c for v in vowels for c in consonants] +
+                                                    [c + v for v in vowels for c in consonants])
+        scoring_model = [(0, 0), (2, 1), (3, 2)]
+        boards = list(generate_boards(5, (3, 3), min_words=4, dictionary=dictionary, scoring_model=scoring_model,
+                                      workers=1, batch_size=8, seed=3))
+        self.assertEqual(5, len(boards))
+        for generated in boards:
+            boggle_instance = Boggle((3, 3), 1, dictionary=dictionary, scoring_model=scoring_model)
+            boggle_instance.board = generated.board
+            self.assertEqual(set(generated.words), boggle_instance.find_all_words())
+            self.assertGreaterEqual(len(generated.words), 4)
+            self.assertEqual(generated.score, sum(boggle_instance.score_word(word) for word in generated.words))
+
+
+class TestSimulation(unittest.TestCase):
+
+    def test_bots_that_find_every_word_share_every_word(self):
+        vowels, consonants = 'aeiou', 'bcdfghlmnprst'
+        dictionary = HelperMethods.write_dictionary([v + c for v in vowels for c in consonants] +
+                                                    [c + v for v in vowels for c in consonants])
+        scoring_model = [(0, 0), (2, 1), (3, 2)]
+        skills = [UniformSkill(1.0), UniformSkill(1.0), UniformSkill(0.0)]
+        yielded = list(simulate(30, (3, 3), skills, rounds=2, dictionary=dictionary, scoring_model=scoring_model,
+                                workers=1, chunk_size=10))
+        snapshots = [stats.summary() for stats in yielded]
+        self.assertEqual([10, 20, 30], [summary['games'] for summary in snapshots])
+        self.assertEqual([{0: 10}, {0: 20}, {0: 30}], [stats.score_histograms[0] for stats in yielded])
+        summary = snapshots[-1]
+        self.assertEqual(60, summary['rounds'])
+        self.assertGreater(summary['mean_words_per_board'], 0)
+        self.assertEqual(1.0, summary['shared_word_rate'])
+        self.assertEqual([{0: 30}] * 3, summary['score_histograms'])
+        self.assertEqual([1.0] * 3, summary['win_rates'])
+
+
+class TestBoggleServer(unittest.IsolatedAsyncioTestCase):
+
+    async def test_players_share_a_timed_round(self):
+        tokens = [token.lower() for token in ALPHABET]
+        dictionary = HelperMethods.write_dictionary([first + second for first in tokens for second in tokens])
+        server = await BoggleServer(port=0, grid_size=(3, 3), max_rounds=1, round_seconds=0.5, dictionary=dictionary,
+                                    scoring_model=[(0, 0), (2, 1), (3, 2)]).start()
+        transcripts = await asyncio.gather(self.play(server, 'Billy'), self.play(server, 'Sally'))
+        server.close()
+        for transcript, name in zip(transcripts, ['Billy', 'Sally']):
+            self.assertEqual(f'WELCOME {name}', transcript[0])
+            self.assertTrue(transcript[1].startswith('BOARD 3 3 '))
+            self.assertIn('ROUND 0 0.5', transcript)
+            self.assertTrue(transcript[transcript.index('ROUND 0 0.5') + 1].startswith('ACCEPTED '))
+            self.assertEqual('REJECTED ZZZZZZZZZZ', transcript[transcript.index('ROUND 0 0.5') + 2])
+            # Both players found the same word, so neither scores.
+            self.assertEqual(['FINAL 0 Billy', 'FINAL 0 Sally', 'GAME_OVER'], transcript[-3:])
+        self.assertEqual(1, server.games_completed)
+
+    async def test_dropped_players_give_up_their_seat(self):
+        dictionary = HelperMethods.write_dictionary(['abe', 'bead', 'fed'])
+        server = await BoggleServer(port=0, grid_size=(3, 3), max_rounds=1, round_seconds=0.2,
+                                    dictionary=dictionary).start()
+        reader, writer = await asyncio.open_connection(server.host, server.port)
+        writer.write(b'Quitter\n')
+        self.assertEqual('WELCOME Quitter', (await reader.readline()).decode().strip())
+        room = server.waiting_room
+        writer.close()
+        await writer.wait_closed()
+        for _ in range(100):
+            if not room.connections:
+                break
+            await asyncio.sleep(0.01)
+        self.assertEqual([], room.game.players)
+        transcripts = await asyncio.gather(self.play(server, 'Billy'), self.play(server, 'Sally'))
+        server.close()
+        self.assertIs(room, server.waiting_room)
+        self.assertEqual(['Billy', 'Sally'], [player.name for player in room.game.players])
+        for transcript in transcripts:
+            self.assertEqual('GAME_OVER', transcript[-1])
+        self.assertEqual(['CLOSED ABE'], room.submit(room.game.players[0], ['ABE']))
+
+    async def test_games_are_recorded_and_instrumented(self):
+        tokens = [token.lower() for token in ALPHABET]
+        dictionary = HelperMethods.write_dictionary([first + second for first in tokens for second in tokens])
+        handle, path = tempfile.mkstemp(suffix='.jsonl')
+        os.close(handle)
+        history, sink = GameHistory(path), MemorySink()
+        server = await BoggleServer(port=0, grid_size=(3, 3), max_rounds=2, round_seconds=0.2, dictionary=dictionary,
+                                    scoring_model=[(0, 0), (2, 1)], history=history, instrumentation_sink=sink).start()
+        await asyncio.gather(self.play(server, 'Billy'), self.play(server, 'Sally'))
+        server.close()
+        history.close()
+        records = list(HistoryReader(path))
+        os.remove(path)
+        self.assertEqual(['round', 'round', 'game'], [record['event'] for record in records])
+        self.assertEqual({'Billy': 0, 'Sally': 0}, records[-1]['scores'])
+        self.assertEqual(['round', 'round', 'game'], [record['event'] for record in sink.records])
+        self.assertLessEqual({'interface', 'validation', 'scoring', 'shuffle'}, set(sink.records[-1]['phases']))
+        self.assertGreaterEqual(sink.records[-1]['counters']['words_submitted'], 2)
+
+    async def test_failed_games_are_logged(self):
+        task = asyncio.get_running_loop().create_future()
+        task.set_exception(RuntimeError('boom'))
+        with self.assertLogs('boggle_server', level='ERROR') as logs:
+            GameRoom.log_failure(task)
+        self.assertIn('boom', logs.output[0])
+
+    @staticmethod
+    async def play(server, name):
+        reader, writer = await asyncio.open_connection(server.host, server.port)
+        writer.write(f'{name}\n'.encode())
+        transcript = []
+        while True:
+            line = (await reader.readline()).decode().strip()
+            if not line:
+                break
+            transcript.append(line)
+            if line.startswith('ROUND '):
+                faces = next(x for x in transcript if x.startswith('BOARD ')).split()[3:]
+                writer.write(f'{faces[0] + faces[1]} zzzzzzzzzz\n'.encode())
+        writer.close()
+        return transcript
+
+
+class TestLetterDistribution(unittest.TestCase):
+
+    def test_alias_table_matches_weights(self):
+        distribution = LetterDistribution({'A': 1, 'B': 2, 'Qu': 5, 'Sch': 0.5})
+        implied = [0.0] * 4
+        for n, (probability, alias) in enumerate(zip(distribution.probability, distribution.alias)):
+            implied[n] += probability / 4
+            implied[alias] += (1 - probability) / 4
+        for share, weight in zip(implied, [1, 2, 5, 0.5]):
+            self.assertAlmostEqual(weight / 8.5, share)
+        self.assertEqual([1, 3, 8, 8.5], distribution.cum_weights)
+
+    def test_custom_dice_with_multi_character_faces(self):
+        distribution = LetterDistribution({'A': 3, 'E': 3, 'L': 2, 'Ll': 1, 'Ch': 1, 'O': 2, 'S': 2})
+        dictionary = HelperMethods.write_dictionary(['llama', 'calle', 'ocho', 'chal', 'sol', 'llos', 'ella', 'eso',
+                                                     'chela', 'lloss', 'asa', 'ala', 'oso', 'cola'])
+        for compact_board in (False, True):
+            boggle_instance = Boggle((5, 5), 1, dictionary=dictionary, distribution=distribution,
+                                     compact_board=compact_board)
+            for _ in range(5):
+                self.assertTrue(set(boggle_instance.board.faces()) <= set(distribution.tokens))
+                self.assertEqual({word for word in boggle_instance.boggle_words
+                                  if boggle_instance.find_word(word.upper())}, boggle_instance.find_all_words())
+                boggle_instance.board.make_cubes()
+                boggle_instance.board.reassign_cubes()
+                boggle_instance.board.shake_cubes()
+
+
+class TestBoardOptimizer(unittest.TestCase):
+
+    def test_incremental_solution_matches_full_solve(self):
+        dictionary = HelperMethods.write_dictionary(['abe', 'bead', 'beaded', 'fed', 'hied', 'cab', 'aquae', 'deed',
+                                                     'hide', 'head', 'bad', 'dab', 'feed', 'ebb', 'ache', 'quiche'])
+        for free_faces in (False, True):
+            boggle_instance = Boggle((4, 4), 1, dictionary=dictionary)
+            optimizer = BoardOptimizer(boggle_instance, free_faces=free_faces, seed=1)
+            for _ in range(300):
+                move = optimizer.mutate()
+                if optimizer.rng.random() < 0.3:
+                    optimizer.undo(move)
+                words = boggle_instance.find_all_words()
+                self.assertEqual(words, optimizer.solver.words)
+                self.assertEqual(boggle_instance.scorer.total(words), optimizer.solver.score)
+
+    def test_drivers_leave_the_board_they_report(self):
+        dictionary = HelperMethods.write_dictionary(['abe', 'bead', 'beaded', 'fed', 'hied', 'cab', 'deed', 'hide',
+                                                     'head', 'bad', 'dab', 'feed', 'ebb', 'ache', 'aid', 'die'])
+        boggle_instance = Boggle((3, 3), 1, dictionary=dictionary)
+        optimizer = BoardOptimizer(boggle_instance, free_faces=True, seed=2)
+        start = optimizer.solver.score
+        climbed = optimizer.hill_climb(200)
+        self.assertGreaterEqual(climbed.score, start)
+        annealed = optimizer.anneal(200)
+        self.assertGreaterEqual(annealed.score, climbed.score)
+        self.assertEqual(annealed.faces, boggle_instance.board.faces())
+        self.assertEqual(boggle_instance.scorer.total(boggle_instance.find_all_words()), annealed.score)
+
+
+class TestIncrementalValidator(unittest.TestCase):
+
+    def test_keystrokes_match_find_word(self):
+        dictionary = HelperMethods.write_dictionary(['abe', 'bead', 'beaded', 'fed', 'hied', 'abc', 'cab', 'aquae'])
+        boggle_instance = HelperMethods.configure_board_for_test('abcdefghi', Boggle((3, 3), 1, dictionary=dictionary))
+        boggle_instance.board.spaces[0][2].cube.top_letter = 'Qu'
+        # [['a', 'b', 'Qu'],
+        #  ['d', 'e', 'f'],
+        #  ['g', 'h', 'i']]
+        validator = IncrementalValidator(boggle_instance)
+        for word in ['BEAD', 'BEADED', 'HIED', 'ABE', 'AQUAE', 'CAB', 'FEDX']:
+            validator.reset()
+            for end in range(1, len(word) + 1):
+                prefix = word[:end]
+                is_word = boggle_instance.find_word(prefix)
+                self.assertEqual(Keystroke(boggle_instance.trace_word(prefix), is_word,
+                                           boggle_instance.score_word(prefix) if is_word else 0),
+                                 validator.feed(word[end - 1]))
+
+    def test_multi_character_face_and_backspace(self):
+        dictionary = HelperMethods.write_dictionary(['queen', 'quack'])
+        boggle_instance = HelperMethods.configure_board_for_test('xeenz', Boggle((5, 1), 1, dictionary=dictionary))
+        boggle_instance.board.spaces[0][0].cube.top_letter = 'Qu'
+        validator = IncrementalValidator(boggle_instance)
+        self.assertEqual(Keystroke(True, False, 0), validator.feed('q'))
+        self.assertEqual(Keystroke(True, False, 0), validator.type('uee'))
+        self.assertEqual(Keystroke(False, False, 0), validator.feed('z'))
+        self.assertEqual(Keystroke(True, False, 0), validator.backspace())
+        self.assertEqual(Keystroke(True, True, 2), validator.feed('n'))
+        self.assertEqual('QUEEN', validator.text)
+
+
+class TestSnapshot(unittest.TestCase):
+
+    def test_boards_round_trip(self):
+        dictionary = HelperMethods.write_dictionary(['abe', 'bead', 'fed', 'hied', 'queen', 'que'])
+        distribution = LetterDistribution({'A': 3, 'E': 3, 'L': 2, 'Ll': 1, 'Ch': 1, 'O': 2, 'S': 2})
+        games = [HelperMethods.configure_board_for_test('abcdefghi', Boggle((3, 3), 1, dictionary=dictionary)),
+                 Boggle((5, 2), 1, dictionary=dictionary, compact_board=True),
+                 Boggle((4, 4), 1, dictionary=dictionary, distribution=distribution)]
+        games[0].board.spaces[0][2].cube.top_letter = 'Qu'
+        path = HelperMethods.temporary_path('.bogs')
+        self.assertEqual(3, write_snapshots(path, [game.board for game in games],
+                                            [games[0].find_all_words(), None, set()]))
+        reader = SnapshotReader(path)
+        self.assertEqual(3, len(reader))
+        for n, game in enumerate(games):
+            self.assertEqual((game.x_width, game.y_width), reader.grid_size(n))
+            self.assertEqual(game.board.faces(), reader.faces(n))
+            for compact in (False, True):
+                board = reader.board(n, compact=compact, distribution=distribution)
+                self.assertEqual(game.board.faces(), board.faces())
+                self.assertEqual([space.cube.letters for row in game.board.spaces for space in row],
+                                 [space.cube.letters for row in board.spaces for space in row])
+        self.assertEqual({'abe', 'bead', 'fed', 'hied', 'que'}, reader.words(0))
+        self.assertIsNone(reader.words(1))
+        self.assertEqual(frozenset(), reader.words(2))
+        self.assertEqual(reader.words(0), reader.game(0, dictionary=dictionary).find_all_words())
+        for compact in (False, True):
+            self.assertEqual(games[2].board.faces(), reader.game(2, compact=compact, dictionary=dictionary,
+                                                                 distribution=distribution).board.faces())
+        with self.assertRaises(IndexError):
+            reader.board(3)
+        reader.close()
+
+    def test_rejects_tokens_too_long_to_store(self):
+        dictionary = HelperMethods.write_dictionary(['abe', 'bead', 'fed'])
+        game = Boggle((2, 2), 1, dictionary=dictionary)
+        path = HelperMethods.temporary_path('.bogs')
+        game.board.spaces[0][0].cube.top_letter = 'É' * 127 + 'A'
+        self.assertEqual(1, write_snapshots(path, [game.board]))
+        reader = SnapshotReader(path)
+        self.assertEqual(game.board.faces(), reader.faces(0))
+        reader.close()
+        game.board.spaces[0][0].cube.top_letter = 'É' * 128
+        with self.assertRaisesRegex(ValueError, '256 bytes'):
+            write_snapshots(path, [game.board])
+        with self.assertRaisesRegex(ValueError, '256 bytes'):
+            SnapshotWriter(path, distribution=LetterDistribution({'É' * 128: 1}))
+
+    def test_rejects_other_files(self):
+        path = HelperMethods.write_dictionary(['abe', 'bead', 'fed', 'hied', 'queen', 'que', 'aaaaaaaaaaaaaaaaaaaaa'])
+        with self.assertRaises(ValueError):
+            SnapshotReader(path)
+
+
+class TestSolutionCache(unittest.TestCase):
+
+    def test_symmetric_boards_share_a_signature(self):
+        # [['a', 'b', 'c'],      [['g', 'd', 'a'],      [['c', 'b', 'a'],
+        #  ['d', 'e', 'f'],       ['h', 'e', 'b'],       ['f', 'e', 'd'],
+        #  ['g', 'h', 'i']]       ['i', 'f', 'c']]       ['i', 'h', 'g']]
+        signature = board_signature(list('abcdefghi'), 3, 3)
+        self.assertEqual(signature, board_signature(list('GDAHEBIFC'), 3, 3))
+        self.assertEqual(signature, board_signature(list('cbafedihg'), 3, 3))
+        self.assertNotEqual(signature, board_signature(list('abcdefgih'), 3, 3))
+        self.assertEqual(board_signature(list('abcdef'), 3, 2), board_signature(list('fedcba'), 3, 2))
+        self.assertNotEqual(board_signature(list('abcdef'), 3, 2), board_signature(list('adbecf'), 2, 3))
+
+    def test_solutions_are_cached_in_memory_and_on_disk(self):
+        dictionary = HelperMethods.write_dictionary(['abe', 'bead', 'fed', 'hied', 'abc', 'cab'])
+        database = HelperMethods.temporary_path('.sqlite')
+        cache = SolutionCache(path=database)
+        boggle_instance = HelperMethods.configure_board_for_test('abcdefghi', Boggle((3, 3), 1, dictionary=dictionary))
+        solution = boggle_instance.solve(cache)
+        self.assertEqual(boggle_instance.solve(), solution)
+        self.assertEqual(({'abe', 'bead', 'fed', 'hied', 'abc'}, 5), solution)
+        rotated = HelperMethods.configure_board_for_test('gdahebifc', Boggle((3, 3), 1, dictionary=dictionary))
+        self.assertEqual(solution, rotated.solve(cache))
+        rescored = HelperMethods.configure_board_for_test('abcdefghi', Boggle((3, 3), 1, dictionary=dictionary,
+                                                                              scoring_model=[(0, 0), (3, 2)]))
+        self.assertEqual(10, rescored.solve(cache).max_score)
+        self.assertEqual({'memory_hits': 1, 'disk_hits': 0, 'misses': 2, 'evictions': 0, 'entries': 2}, cache.stats())
+        cache.close()
+        reopened = SolutionCache(path=database)
+        self.assertEqual(solution, rotated.solve(reopened))
+        self.assertEqual({'memory_hits': 0, 'disk_hits': 1, 'misses': 0, 'evictions': 0, 'entries': 1},
+                         reopened.stats())
+        reopened.discard_stale(rescored)
+        reopened.close()
+        reopened = SolutionCache(path=database)
+        self.assertEqual(solution, rotated.solve(reopened))
+        self.assertEqual(1, reopened.stats()['misses'])
+        reopened.close()
+
+    def test_counters_add_up_across_threads(self):
+        dictionary = HelperMethods.write_dictionary(['abe', 'bead', 'fed', 'hied', 'abc'])
+        games = [HelperMethods.configure_board_for_test(faces, Boggle((3, 3), 1, dictionary=dictionary))
+                 for faces in ('abcdefghi', 'bcdefghia', 'cdefghiab')]
+        cache = SolutionCache(max_entries=2)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(lambda n: games[n % 3].solve(cache), range(300)))
+        stats = cache.stats()
+        self.assertEqual(300, stats['memory_hits'] + stats['misses'])
+        self.assertEqual(2, stats['entries'])
+        # Two threads can miss on the same Board at once, and the second put then evicts nothing.
+        self.assertLessEqual(stats['evictions'], stats['misses'] - 2)
+        self.assertGreater(stats['evictions'], 0)
+
+
+class TestBenchmarkSuite(unittest.TestCase):
+
+    def test_scripted_game_runs_headless(self):
+        dictionary = HelperMethods.write_dictionary(['abe', 'bead', 'fed', 'hied', 'abc', 'cab'])
+        boggle_instance = Boggle((4, 4), 2, dictionary=dictionary, max_players=3)
+        boggle_instance.interface = ScriptedInterface(boggle_instance, 3, sorted(boggle_instance.boggle_words))
+        boggle_instance.add_players()
+        winner = boggle_instance.run_game()
+        self.assertEqual(['Player 0', 'Player 1', 'Player 2'], [player.name for player in boggle_instance.players])
+        self.assertIn(winner, boggle_instance.players)
+        self.assertEqual(2, boggle_instance.current_round)
+
+    def test_find_regressions(self):
+        baseline = {'fast': 0.0001, 'steady': 0.5, 'slower': 0.5, 'removed': 1.0}
+        results = {'fast': 0.0009, 'steady': 0.6, 'slower': 0.7, 'added': 1.0}
+        self.assertEqual([('slower', 0.5, 0.7)], find_regressions(results, baseline, threshold=0.25, floor=0.001))
+
+
+class TestGameHistory(unittest.TestCase):
+
+    def test_rounds_are_streamed_and_dropped(self):
+        tokens = [token.lower() for token in ALPHABET]
+        dictionary = HelperMethods.write_dictionary([a + b + c for a in 'aeiou' for b in tokens for c in 'aeiou'])
+        path = HelperMethods.temporary_path('.jsonl')
+        history = GameHistory(path)
+        for _ in range(2):
+            boggle_instance = Boggle((4, 4), 3, dictionary=dictionary, history=history)
+            boggle_instance.interface = ScriptedInterface(boggle_instance, 3, sorted(boggle_instance.boggle_words))
+            boggle_instance.add_players()
+            boggle_instance.run_game()
+            self.assertTrue(all(player.words == {} for player in boggle_instance.players))
+        history.close()
+        reader = HistoryReader(path)
+        self.assertEqual(['round'] * 3 + ['game'] + ['round'] * 3 + ['game'], [record['event'] for record in reader])
+        replayed = list(reader.replay())
+        self.assertEqual({player.name: player.score for player in boggle_instance.players}, replayed[-1][1])
+        summary = reader.aggregate()
+        self.assertEqual((2, 6), (summary['games'], summary['rounds']))
+        self.assertEqual(history.totals, summary['scores'])
+        for record in reader.rounds():
+            for player in record['players']:
+                self.assertEqual(sum(player['words'].values()), player['score'])
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def test_rounds_and_game_are_recorded(self):
+        dictionary = HelperMethods.write_dictionary(['abe', 'bead', 'fed', 'hied', 'abc', 'cab'])
+        sink = MemorySink()
+        boggle_instance = Boggle((4, 4), 2, dictionary=dictionary, instrumentation=Instrumentation(sink))
+        boggle_instance.interface = ScriptedInterface(boggle_instance, 2, sorted(boggle_instance.boggle_words),
+                                                      words_per_turn=4)
+        boggle_instance.add_players()
+        boggle_instance.run_game()
+        self.assertEqual(['round', 'round', 'game'], [record['event'] for record in sink.records])
+        self.assertEqual([0, 1], [record['round'] for record in sink.records[:2]])
+        for record in sink.records[:2]:
+            self.assertEqual({'interface', 'validation', 'scoring', 'shuffle'}, set(record['phases']))
+            self.assertEqual(8, record['counters']['words_submitted'])
+            self.assertGreater(record['counters']['search_nodes'], 0)
+            self.assertTrue(0 <= record['prune_rate'] <= 1)
+        game = sink.records[2]
+        self.assertEqual(2, game['rounds'])
+        self.assertIn('dictionary_load', game['phases'])
+        self.assertEqual(16, game['counters']['words_submitted'])
+        self.assertEqual(sum(record['counters']['search_nodes'] for record in sink.records[:2]),
+                         game['counters']['search_nodes'])
+
+    def test_callback_sink(self):
+        records = []
+        instrumentation = Instrumentation(CallbackSink(records.append))
+        with instrumentation.phase('scoring'):
+            instrumentation.count('search_nodes', 4)
+            instrumentation.count('search_pruned', 1)
+        instrumentation.end_round(0)
+        self.assertEqual(0.25, records[0]['prune_rate'])
+        self.assertEqual({'scoring'}, set(records[0]['phases']))
+
+
+class TestCompiledDictionary(unittest.TestCase):
+
+    def test_compiled_dictionary_matches_word_list(self):
+        words = ['abe', 'bead', 'fed', 'hied', 'abc', 'cab', 'queen', 'am', 'abcdefghij', 'Déjà']
+        dictionary = HelperMethods.write_dictionary(words)
+        compiled = dictionary + CompiledDictionary.SUFFIX
+        HelperMethods.temporary_files.append(compiled)
+        self.assertEqual(len(words), compile_dictionary(dictionary, compiled))
+        text_instance = HelperMethods.configure_board_for_test('abcdefghi', Boggle((3, 3), 1, dictionary=dictionary))
+        compiled_instance = HelperMethods.configure_board_for_test('abcdefghi', Boggle((3, 3), 1, dictionary=compiled))
+        for word in words + ['ab', 'abed', 'beads', 'deja', 'xyz', '']:
+            self.assertEqual(text_instance.check_if_valid_english(word.lower()),
+                             compiled_instance.check_if_valid_english(word.lower()))
+        self.assertEqual(text_instance.find_all_words(), compiled_instance.find_all_words())
+        trie = CompiledDictionary(compiled, min_length=4, max_length=5)
+        self.assertIsNotNone(trie.step(trie.root, 'be'))
+        self.assertIsNone(trie.step(trie.root, 'bx'))
+        self.assertFalse(trie.is_word(trie.step(trie.root, 'be')))
+        self.assertEqual(set(load_words(dictionary, 4, 5)), set(trie))
+        self.assertEqual(len(load_words(dictionary, 4, 5)), len(trie))
+        trie.close()
+        unbounded = CompiledDictionary(compiled)
+        self.assertEqual(len(words), len(unbounded))
+        unbounded.close()
+
+
+class TestDictionaryCache(unittest.TestCase):
+
+    def test_instances_share_dictionary(self):
+        dictionary = HelperMethods.write_dictionary(['abe', 'bead', 'fed'])
+        hits, misses = dictionary_cache.stats()['hits'], dictionary_cache.stats()['misses']
+        first = Boggle((3, 3), 1, dictionary=dictionary)
+        second = Boggle((3, 3), 1, dictionary=dictionary)
+        self.assertIs(first.boggle_words, second.boggle_words)
+        self.assertIs(first.build_word_trie(), second.build_word_trie())
+        self.assertEqual(misses + 1, dictionary_cache.stats()['misses'])
+        self.assertEqual(hits + 1, dictionary_cache.stats()['hits'])
+        self.assertIsNot(first.boggle_words, Boggle((2, 2), 1, dictionary=dictionary).boggle_words)
+        os.utime(dictionary, ns=(0, 0))
+        self.assertIsNot(first.boggle_words, Boggle((3, 3), 1, dictionary=dictionary).boggle_words)
+
+    def test_prefetches_are_counted_and_survive_a_fork(self):
+        dictionary = HelperMethods.write_dictionary(['abe', 'bead', 'fed'])
+        cache = DictionaryCache()
+        first, second = cache.prefetch(dictionary, 3, 9), cache.prefetch(dictionary, 3, 9)
+        entry = cache.wait(first, dictionary, 3, 9)
+        self.assertIs(entry, cache.wait(second, dictionary, 3, 9))
+        self.assertEqual((1, 1), (cache.stats()['hits'], cache.stats()['misses']))
+        cache.forget_loader()
+        orphaned = Prefetch(first.generation, Future())
+        self.assertIs(entry, cache.wait(orphaned, dictionary, 3, 9))
+        self.assertIs(entry, cache.wait(cache.prefetch(dictionary, 3, 9), dictionary, 3, 9))
+
+    def test_least_recently_used_eviction(self):
+        dictionary = HelperMethods.write_dictionary(['abe', 'bead', 'fed'])
+        cache = DictionaryCache(max_bytes=1)
+        first = cache.get(dictionary, 3, 9)
+        self.assertIs(first, cache.get(dictionary, 3, 9))
+        cache.get(dictionary, 3, 4)
+        self.assertIsNot(first, cache.get(dictionary, 3, 9))
+        self.assertEqual({'hits': 1, 'misses': 3, 'evictions': 2, 'entries': 1}, {
+            key: value for key, value in cache.stats().items() if key in ('hits', 'misses', 'evictions', 'entries')})
+
+
+class TestLazyInit(unittest.TestCase):
+
+    def test_missing_dictionary_fails_at_first_use(self):
+        game = Boggle((3, 3), 1, dictionary=os.path.join(tempfile.mkdtemp(), 'missing.txt'))
+        with self.assertRaises(FileNotFoundError):
+            game.find_word('ABE')
+        with self.assertRaises(FileNotFoundError):
+            game.boggle_words
+
+    def test_board_is_built_on_first_use(self):
+        dictionary = HelperMethods.write_dictionary(['abe', 'bead', 'fed'])
+        game = Boggle((3, 3), 1, dictionary=dictionary)
+        self.assertIsNone(game.current_board)
+        space = game.board.spaces[1][1]
+        self.assertIsNone(game.board.adjacency_table)
+        self.assertIsNone(space.adjacent_spaces)
+        self.assertEqual(8, len(space.adjacents))
+        self.assertEqual(9, len(game.board.adjacency))
+        HelperMethods.configure_board_for_test('abcdefghi', game)
+        self.assertTrue(game.find_word('BEAD'))
+        self.assertEqual({'abe', 'bead', 'fed'}, game.find_all_words())
+
+
 class HelperMethods:
 
+    @staticmethod
+    def write_dictionary(words):
+        """
+        :param words: The words the dictionary should contain
+        :return: The path of a temporary dictionary file, which is removed when the test run exits
+        """
+        handle, path = tempfile.mkstemp(suffix='.txt')
+        with os.fdopen(handle, 'w') as dictionary:
+            dictionary.write('\n'.join(words))
+        HelperMethods.temporary_files.append(path)
+        return path
+
+    @staticmethod
+    def temporary_path(suffix=''):
+        """
+        :return: The path of a new, empty temporary file, which is removed when the test run exits
+        """
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        os.close(handle)
+        HelperMethods.temporary_files.append(path)
+        return path
+
+    temporary_files = []
+
     @staticmethod
     def configure_board_for_test(test_string, boggle_instance):
         string_array = HelperMethods.generate_string_array(test_string, boggle_instance.x_width, boggle_instance.y_width)
@@ -333,5 +1058,10 @@ class TestHelperMethods(unittest.TestCase):
                 self.assertEqual(boggle_instance_tl_mod.board.spaces[r_idx][c_idx].cube.top_letter, string_array[r_idx][c_idx])
 
 
+def tearDownModule():
+    for path in HelperMethods.temporary_files:
+        os.remove(path)
+
+
 if __name__ == '__main__':
     unittest.main()